@@ -0,0 +1,62 @@
+"""add recordings catalog table
+
+Revision ID: 0b95213c0750
+Revises: 563094bf02c2
+Create Date: 2026-10-18 15:02:44.183906
+
+"""
+import os
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b95213c0750'
+down_revision: Union[str, None] = '563094bf02c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RECORDINGS_DIR = 'app/uploads/recordings'
+
+
+def upgrade() -> None:
+    recordings = op.create_table('recordings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('hospital_id', sa.Integer(), nullable=True),
+    sa.Column('uid', sa.String(length=100), nullable=True),
+    sa.Column('visit_id', sa.Integer(), nullable=True),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('content_type', sa.String(length=50), nullable=True),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+    sa.Column('duration_seconds', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recordings_filename'), 'recordings', ['filename'], unique=True)
+    op.create_index('ix_recordings_hospital_uid_visit', 'recordings', ['hospital_id', 'uid', 'visit_id'])
+
+    # Catalog the recordings already on disk so list_recordings keeps
+    # returning them; their hospital/patient are unknown.
+    if os.path.isdir(RECORDINGS_DIR):
+        rows = []
+        for name in sorted(os.listdir(RECORDINGS_DIR)):
+            path = os.path.join(RECORDINGS_DIR, name)
+            if name.endswith('.webm') and os.path.isfile(path):
+                st = os.stat(path)
+                rows.append({
+                    'filename': name,
+                    'content_type': 'video/webm',
+                    'size_bytes': st.st_size,
+                    'created_at': datetime.utcfromtimestamp(st.st_mtime),
+                })
+        if rows:
+            op.bulk_insert(recordings, rows)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recordings_hospital_uid_visit', table_name='recordings')
+    op.drop_index(op.f('ix_recordings_filename'), table_name='recordings')
+    op.drop_table('recordings')
@@ -0,0 +1,26 @@
+"""add thumbnail_renditions to snapshots
+
+Revision ID: 563094bf02c2
+Revises: f81b70222c53
+Create Date: 2026-10-18 14:21:09.651380
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '563094bf02c2'
+down_revision: Union[str, None] = 'f81b70222c53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('snapshots', sa.Column('thumbnail_renditions', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('snapshots', 'thumbnail_renditions')
@@ -0,0 +1,51 @@
+"""add composite indexes for hot lookup columns
+
+Revision ID: 6d9b9a3c2208
+Revises: 7fce09026ece
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d9b9a3c2208'
+down_revision: Union[str, None] = '7fce09026ece'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_patient_registration_hospital_uid',
+        'patient_registration', ['hospital_id', 'uid'],
+    )
+    op.create_index(
+        'ix_patient_registration_hospital_entry_date',
+        'patient_registration', ['hospital_id', 'entry_date'],
+    )
+    op.create_index(
+        'ix_patient_registration_hospital_doctor_entry_date',
+        'patient_registration', ['hospital_id', 'doctor_id', 'entry_date'],
+    )
+    op.create_index(
+        'ix_snapshots_hospital_uid_visit',
+        'snapshots', ['hospital_id', 'uid', 'visit_id'],
+    )
+    # Fails if patient_info already holds duplicate (hospital_id, uid) rows;
+    # merge those by hand before upgrading.
+    op.create_unique_constraint(
+        'uq_patient_info_hospital_uid',
+        'patient_info', ['hospital_id', 'uid'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_patient_info_hospital_uid', 'patient_info', type_='unique')
+    op.drop_index('ix_snapshots_hospital_uid_visit', table_name='snapshots')
+    op.drop_index('ix_patient_registration_hospital_doctor_entry_date', table_name='patient_registration')
+    op.drop_index('ix_patient_registration_hospital_entry_date', table_name='patient_registration')
+    op.drop_index('ix_patient_registration_hospital_uid', table_name='patient_registration')
@@ -0,0 +1,30 @@
+"""add region and use_auth_secret to ice_servers
+
+Revision ID: a41c7e9d2b6f
+Revises: 0b95213c0750
+Create Date: 2026-10-18 16:21:09.512448
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c7e9d2b6f'
+down_revision: Union[str, None] = '0b95213c0750'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('ice_servers', sa.Column('region', sa.String(length=50), nullable=True))
+    op.add_column('ice_servers', sa.Column('use_auth_secret', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.create_index(op.f('ix_ice_servers_region'), 'ice_servers', ['region'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ice_servers_region'), table_name='ice_servers')
+    op.drop_column('ice_servers', 'use_auth_secret')
+    op.drop_column('ice_servers', 'region')
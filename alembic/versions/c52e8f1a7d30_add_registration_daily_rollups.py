@@ -0,0 +1,57 @@
+"""add registration daily rollups
+
+Revision ID: c52e8f1a7d30
+Revises: a41c7e9d2b6f
+Create Date: 2026-10-18 17:05:31.207655
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52e8f1a7d30'
+down_revision: Union[str, None] = 'a41c7e9d2b6f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('registration_daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('hospital_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('procedure_name', sa.String(length=100), nullable=False),
+    sa.Column('referrer_name', sa.String(length=100), nullable=False),
+    sa.Column('doctor_id', sa.String(length=100), nullable=False),
+    sa.Column('doctor_name', sa.String(length=100), nullable=False),
+    sa.Column('registrations', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('hospital_id', 'day', 'procedure_name', 'referrer_name', 'doctor_id', name='uq_registration_daily_rollup')
+    )
+
+    # Backfill from existing registrations
+    op.execute("""
+        INSERT INTO registration_daily_rollups
+            (hospital_id, day, procedure_name, referrer_name, doctor_id, doctor_name, registrations)
+        SELECT hospital_id, entry_date,
+               COALESCE(procedure_name, ''), COALESCE(referrer_name, ''), COALESCE(doctor_id, ''),
+               COALESCE(MAX(doctor_name), ''), COUNT(*)
+        FROM patient_registration
+        WHERE hospital_id IS NOT NULL AND entry_date IS NOT NULL
+        GROUP BY hospital_id, entry_date,
+                 COALESCE(procedure_name, ''), COALESCE(referrer_name, ''), COALESCE(doctor_id, '')
+    """)
+
+    # Bring the denormalized counters in line; they are maintained from here on
+    op.execute("""
+        UPDATE hospitals SET
+            total_patients = (SELECT COUNT(*) FROM patient_info WHERE patient_info.hospital_id = hospitals.id),
+            total_devices = (SELECT COUNT(*) FROM devices WHERE devices.hospital_id = hospitals.id)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('registration_daily_rollups')
@@ -0,0 +1,26 @@
+"""add content_hash to snapshots
+
+Revision ID: f81b70222c53
+Revises: f9e3c82f7b20
+Create Date: 2026-10-18 13:05:47.220913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f81b70222c53'
+down_revision: Union[str, None] = 'f9e3c82f7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('snapshots', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('snapshots', 'content_hash')
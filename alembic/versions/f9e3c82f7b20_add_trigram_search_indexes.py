@@ -0,0 +1,45 @@
+"""add trigram indexes for find-patients text search
+
+Revision ID: f9e3c82f7b20
+Revises: 6d9b9a3c2208
+Create Date: 2026-10-18 11:40:05.918224
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f9e3c82f7b20'
+down_revision: Union[str, None] = '6d9b9a3c2208'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_INDEXES = [
+    ('ix_patient_info_name_trgm', 'patient_info', 'name'),
+    ('ix_patient_registration_doctor_name_trgm', 'patient_registration', 'doctor_name'),
+    ('ix_patient_registration_procedure_name_trgm', 'patient_registration', 'procedure_name'),
+]
+
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    if is_postgres:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    for name, table, column in TRIGRAM_INDEXES:
+        if is_postgres:
+            op.create_index(
+                name, table, [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+            )
+        else:
+            op.create_index(name, table, [column])
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -9,6 +9,8 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 from app.models.database import Base, engine
+from app.utils.security import shutdown_hash_pool
+from app.utils import rollups  # noqa: F401  (session hooks that keep rollups current)
 from app.routers import (
     devices,
     hospitals,
@@ -21,6 +23,8 @@ from app.routers import (
     procedures,
     snapshots,
     dashboard,        
+    insights,
+    ws_signaling,
 )
 
 import uvicorn
@@ -112,6 +116,9 @@ app.include_router(turnservers.router, prefix="/api", tags=["IceServers"])
 app.include_router(snapshots.router, prefix="/api", tags=["Snapshots"])
 app.include_router(recordings.router, prefix="/api", tags=["Recordings"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"]) 
+app.include_router(insights.router, prefix="/api/insights", tags=["Insights"])
+# Raw-WebSocket signaling (Socket.IO clients use the socket_server app)
+app.include_router(ws_signaling.router, tags=["Signaling"])
 
 
 @app.get("/")
@@ -130,6 +137,11 @@ def create_tables():
     Base.metadata.create_all(bind=engine)
 
 
+@app.on_event("shutdown")
+def stop_hash_pool():
+    shutdown_hash_pool()
+
+
 def run_api():
     """Entry point for `poetry run start-api`."""
     uvicorn.run(
@@ -1,10 +1,23 @@
 from datetime import date
 
-from sqlalchemy import Column, ForeignKey, String, Integer, Boolean, Date, Text, DateTime
+from sqlalchemy import Column, ForeignKey, String, Integer, BigInteger, Boolean, Date, Float, Text, DateTime, Index, UniqueConstraint
+from sqlalchemy import DDL, event
+from sqlalchemy.orm import column_property
 from sqlalchemy.ext.declarative import declarative_base
 from app.models.database import Base
 from datetime import datetime
 
+
+def tracked_column(*args, **kwargs):
+    """
+    A Column whose value before a change stays in attribute history even
+    when the instance was expired (e.g. by a commit) before being modified.
+    The rollup / hospital-counter hooks in app/utils/rollups.py read that
+    history to know which row a change moves a count away from.
+    """
+    return column_property(Column(*args, **kwargs), active_history=True)
+
+
 class Hospital(Base):
     __tablename__ = "hospitals"
 
@@ -43,7 +56,7 @@ class Device(Base):
     __tablename__ = "devices"
 
     id = Column(Integer, primary_key=True)
-    hospital_id = Column(Integer)
+    hospital_id = tracked_column(Integer)
     device_id = Column(String(20), nullable=False)
     is_default = Column(Boolean, default=False)
 
@@ -129,9 +142,16 @@ class Report(Base):
 
 class PatientInfo(Base):
     __tablename__ = "patient_info"
+    __table_args__ = (
+        UniqueConstraint("hospital_id", "uid", name="uq_patient_info_hospital_uid"),
+        Index(
+            "ix_patient_info_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
-    hospital_id = Column(Integer)
+    hospital_id = tracked_column(Integer)
     uid = Column(String(100))
     name = Column(String(100))
     mobile = Column(String(15))
@@ -143,21 +163,46 @@ class PatientInfo(Base):
     entry_date = Column(Date, default=date.today)
 
 
+# pg_trgm must exist before create_all() builds the gin_trgm_ops indexes.
+# Other dialects (e.g. SQLite) fall back to plain indexes on these columns.
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
 class PatientRegistration(Base):
     __tablename__ = "patient_registration"
+    __table_args__ = (
+        Index("ix_patient_registration_hospital_uid", "hospital_id", "uid"),
+        Index("ix_patient_registration_hospital_entry_date", "hospital_id", "entry_date"),
+        Index(
+            "ix_patient_registration_hospital_doctor_entry_date",
+            "hospital_id", "doctor_id", "entry_date",
+        ),
+        Index(
+            "ix_patient_registration_doctor_name_trgm", "doctor_name",
+            postgresql_using="gin", postgresql_ops={"doctor_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_patient_registration_procedure_name_trgm", "procedure_name",
+            postgresql_using="gin", postgresql_ops={"procedure_name": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
-    hospital_id = Column(Integer)
+    hospital_id = tracked_column(Integer)
     uid = Column(String(100))
     alt_id = Column(String(100), default="--")
     procedure_id = Column(Integer)
-    procedure_name = Column(String(100))
-    doctor_id = Column(String(100))
+    procedure_name = tracked_column(String(100))
+    doctor_id = tracked_column(String(100))
     doctor_name = Column(String(100))
     anesthesian_id = Column(String(10), default="--")
     anesthesian_name = Column(String(100), default="--")
     referrer_id = Column(String(100))
-    referrer_name = Column(String(100))
+    referrer_name = tracked_column(String(100))
     nurse_id = Column(String(10), default="--")
     nurse_name = Column(String(100), default="--")
     status = Column(String(100), default="--")
@@ -165,12 +210,39 @@ class PatientRegistration(Base):
     activity_status = Column(String(120), default="1")
     activity_date = Column(String(120))
     activity_log = Column(Text, default='')
-    entry_date = Column(Date, default=date.today)
+    entry_date = tracked_column(Date, default=date.today)
     visit_id = Column(Integer, default=1)
 
 
+class RegistrationDailyRollup(Base):
+    """
+    Registrations per hospital/day/procedure/referrer/doctor, kept current
+    by app.utils.rollups. Missing dimensions are stored as '' so they take
+    part in the unique key.
+    """
+    __tablename__ = "registration_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "hospital_id", "day", "procedure_name", "referrer_name", "doctor_id",
+            name="uq_registration_daily_rollup",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    hospital_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)
+    procedure_name = Column(String(100), nullable=False, default="")
+    referrer_name = Column(String(100), nullable=False, default="")
+    doctor_id = Column(String(100), nullable=False, default="")
+    doctor_name = Column(String(100), nullable=False, default="")
+    registrations = Column(Integer, nullable=False, default=0)
+
+
 class Snapshots(Base):
     __tablename__ = "snapshots"
+    __table_args__ = (
+        Index("ix_snapshots_hospital_uid_visit", "hospital_id", "uid", "visit_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     hospital_id = Column(Integer)
@@ -180,11 +252,30 @@ class Snapshots(Base):
     procedure_datetime = Column(String(100))
     file_src = Column(String(100))
     file_thumbnail = Column(String(100))
+    content_hash = Column(String(64), nullable=True)  # sha256 hex of file bytes
+    thumbnail_renditions = Column(Text, nullable=True)  # JSON: {"320": "/uploads/...", ...}
     file_type = Column(String(10), default="snap")
     file_status = Column(String(10), default="main")
     annotation_data = Column(Text, default='')
 
 
+class Recording(Base):
+    __tablename__ = "recordings"
+    __table_args__ = (
+        Index("ix_recordings_hospital_uid_visit", "hospital_id", "uid", "visit_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    hospital_id = Column(Integer)
+    uid = Column(String(100))
+    visit_id = Column(Integer)
+    filename = Column(String(255), nullable=False, unique=True, index=True)
+    content_type = Column(String(50), default="video/webm")
+    size_bytes = Column(BigInteger, default=0)
+    duration_seconds = Column(Float, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class MenuItem(Base):
     __tablename__ = "menu_items"
 
@@ -214,6 +305,8 @@ class IceServer(Base):
     urls = Column(String, nullable=False)  # comma-separated string of STUN/TURN URLs
     username = Column(String, nullable=True)
     credential = Column(String, nullable=True)
+    region = Column(String(50), nullable=True, index=True)  # NULL = serve to every region
+    use_auth_secret = Column(Boolean, nullable=False, default=False)  # issue TURN REST credentials
 
 
 
@@ -225,7 +318,7 @@ class User(Base):
     fullname = Column(String(100), nullable=False)
     mobile = Column(String(50), unique=True, nullable=False)
     # ✅ NEW: login_name for username-like login (e.g., APLH001)
-    login_name = Column(String(50), nullable=False)
+    login_name = Column(String(50), nullable=False, unique=True, index=True)
     roleId = Column(Integer, nullable=True)
     role_name = Column(String(50), nullable=True)
     department = Column(Integer, nullable=True)
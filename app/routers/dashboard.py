@@ -1,3 +1,4 @@
+from datetime import date
 from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -5,7 +6,9 @@ from sqlalchemy.orm import Session
 
 from app.models.all_models import Hospital
 from app.schemas.all import HospitalResponse
+from app.tasks.rollup_tasks import enqueue_rollup_rebuild
 from app.utils.deps import get_db, system_admin_required
+from app.utils.rollups import registration_summary
 
 router = APIRouter(
     tags=["dashboard"],
@@ -90,3 +93,36 @@ def hospitals_dynamic(
         HospitalResponse.model_validate(b, from_attributes=True)
         for b in branch_objs
     ]
+
+
+@router.get("/registrations/summary")
+def registrations_summary(
+    hospital_id: Optional[int] = Query(None, description="Omit for all hospitals"),
+    from_date: Optional[date] = Query(None),
+    to_date: Optional[date] = Query(None),
+    period: str = Query("month", pattern="^(month|quarter|year)$"),
+    group_by: Optional[str] = Query(None, pattern="^(procedure|referrer|doctor)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    Registration counts per month/quarter/year, optionally broken down by
+    procedure, referrer or doctor. Served from the daily rollups, so it
+    does not scan patient_registration.
+    """
+    return {
+        "hospital_id": hospital_id,
+        "period": period,
+        "group_by": group_by,
+        "buckets": registration_summary(db, hospital_id, from_date, to_date, period, group_by),
+    }
+
+
+@router.post("/registrations/rollups/rebuild", status_code=202)
+def rebuild_registration_rollups(
+    hospital_id: Optional[int] = Query(None),
+    from_date: Optional[date] = Query(None),
+    to_date: Optional[date] = Query(None),
+):
+    """Queue a recompute of the rollups (and hospital counters) from raw rows."""
+    job = enqueue_rollup_rebuild(hospital_id, from_date, to_date)
+    return {"job_id": job.id, "status": job.get_status()}
@@ -5,21 +5,25 @@ from typing import Optional, List
 from app.models.all_models import Device as DeviceModel
 from app.schemas.all import Device, DeviceCreate, DeviceListResponse
 from app.models.database import get_db
+from app.utils.pagination import paginate
+from app.utils.serialization import RowSerializer, json_response
 
 router = APIRouter()
 
+device_rows = RowSerializer(Device, DeviceModel)
+
 @router.get("/", response_model=List[Device])
 def get_devices(
     hospid: Optional[int] = Query(None),
     deviceid: Optional[int] = Query(None),
     db: Session = Depends(get_db)
 ):
-    query = db.query(DeviceModel)
+    query = db.query(*device_rows.columns)
     if hospid:
         query = query.filter(DeviceModel.hospital_id == hospid)
     if deviceid:
         query = query.filter(DeviceModel.id == deviceid)
-    return query.all()
+    return json_response(device_rows.dicts(query.all()))
 
 @router.post("/", response_model=Device, status_code=status.HTTP_201_CREATED)
 def create_device(device: DeviceCreate, db: Session = Depends(get_db)):
@@ -52,17 +56,20 @@ def delete_device(deviceid: int = Query(...), db: Session = Depends(get_db)):
     return {"detail": f"Device with id {deviceid} deleted successfully"}
 
 
-@router.get("/", response_model=DeviceListResponse)
-def get_devices(
+# Paginated listing; GET / keeps returning the plain list older clients expect
+@router.get("/catalog", response_model=DeviceListResponse)
+def get_device_catalog(
     hospid: Optional[int] = Query(None),
     deviceid: Optional[int] = Query(None),
     device_uid: Optional[str] = Query(None),
     is_default: Optional[bool] = Query(None),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    with_total: bool = Query(True),
     db: Session = Depends(get_db)
 ):
-    query = db.query(DeviceModel)
+    query = db.query(*device_rows.columns)
 
     # Filtering
     if hospid:
@@ -74,12 +81,21 @@ def get_devices(
     if is_default is not None:
         query = query.filter(DeviceModel.is_default == is_default)
 
-    total = query.count()
-    devices = query.offset(offset).limit(limit).all()
+    page = paginate(
+        query,
+        (DeviceModel.id,),
+        key=lambda row: (row.id,),
+        limit=limit,
+        cursor=cursor,
+        offset=offset,
+        with_total=with_total,
+        descending=False,
+    )
 
-    return {
-        "total": total,
+    return json_response({
+        "total": page["total"],
         "limit": limit,
         "offset": offset,
-        "devices": devices
-    }
\ No newline at end of file
+        "devices": device_rows.dicts(page["items"]),
+        "next_cursor": page["next_cursor"]
+    })
\ No newline at end of file
@@ -7,7 +7,7 @@ from typing import List
 from app.models.all_models import Hospital, User
 from app.utils.deps import get_db, system_admin_required
 from app.schemas.all import HospitalCreate, HospitalResponse
-from app.utils.security import hash_password
+from app.utils.security import hash_password_pooled
 
 router = APIRouter()
 
@@ -60,7 +60,7 @@ def create_hospital(
         is_hadmin=True,
         hspId=str(db_hospital.id),
         show_pwd=db_hospital.login_password,
-        hashed_password=hash_password(db_hospital.login_password),
+        hashed_password=hash_password_pooled(db_hospital.login_password),
         is_active=True,
         active =True
     )
@@ -1,13 +1,67 @@
+import json
 from datetime import datetime
+from itertools import islice
 from fastapi import APIRouter, Depends, Query
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.schemas.all import PatientRegistration, PatientInfo
 from app.models import all_models as models
-from app.models.database import get_db
+from app.models.database import SessionLocal, get_db
+from app.utils.deps import hospital_scope_required
+from app.utils.export import CSV_MEDIA_TYPE, attachment, csv_stream, export_filename
+from app.utils.pagination import paginate
+from app.utils.patients import patient_info_join, resolve_patient_info
+
+# Every insights endpoint reports on one hospital, named by ?hospid=
+router = APIRouter(dependencies=[Depends(hospital_scope_required)])
+
+# Rows fetched per server-side cursor round trip when streaming summaries
+SUMMARY_CHUNK_SIZE = 1000
+
+SUMMARY_FIELDS = [
+    "uid", "Patient_Name", "Alt_Id", "Mobile", "Entry_Date", "Referrer_Name", "Procedure_Name",
+]
+
+
+def _summary_rows(
+    db: Session,
+    hospid: int,
+    from_date: str,
+    to_date: str,
+    selected_procedure: Optional[str],
+    selected_referrer: Optional[str],
+):
+    """
+    One joined, column-projected query for the summary: registrations in the
+    date range paired with their PatientInfo row from the same hospital.
+    """
+    query = (
+        db.query(
+            models.PatientInfo.uid,
+            models.PatientInfo.name,
+            models.PatientInfo.alt_id,
+            models.PatientInfo.mobile,
+            models.PatientRegistration.entry_date,
+            models.PatientRegistration.referrer_name,
+            models.PatientRegistration.procedure_name,
+        )
+        .join(models.PatientInfo, patient_info_join())
+        .filter(
+            models.PatientRegistration.hospital_id == hospid,
+            models.PatientRegistration.entry_date >= from_date,
+            models.PatientRegistration.entry_date <= to_date
+        )
+    )
+
+    if selected_procedure:
+        query = query.filter(models.PatientRegistration.procedure_name == selected_procedure)
+    if selected_referrer:
+        query = query.filter(models.PatientRegistration.referrer_name == selected_referrer)
+
+    return query.order_by(models.PatientRegistration.id).yield_per(SUMMARY_CHUNK_SIZE)
 
-router = APIRouter()
 
 @router.post("/summary-dates-filter")
 def business_dates_filter(
@@ -16,36 +70,59 @@ def business_dates_filter(
     to_date: str = Query(...),
     selected_procedure: Optional[str] = Query(None),
     selected_referrer: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    format: str = Query("json", pattern="^(json|csv)$"),
 ):
-    query = db.query(models.PatientRegistration).filter(
-        models.PatientRegistration.hospital_id == hospid,
-        models.PatientRegistration.entry_date >= from_date,
-        models.PatientRegistration.entry_date <= to_date
-    )
-
-    if selected_procedure:
-        query = query.filter(models.PatientRegistration.procedure_name == selected_procedure)
-    if selected_referrer:
-        query = query.filter(models.PatientRegistration.referrer_name == selected_referrer)
-
-    pr_data = query.all()
-    result = []
-
-    for pr in pr_data:
-        pat = db.query(models.PatientInfo).filter_by(uid=pr.uid).first()
-        if pat:
-            result.append({
-                "uid": pat.uid,
-                "Patient_Name": pat.name,
-                "Alt_Id": pat.alt_id,
-                "Mobile": pat.mobile,
-                "Entry_Date": pr.entry_date,
-                "Referrer_Name": pr.referrer_name,
-                "Procedure_Name": pr.procedure_name
-            })
-
-    return result
+    if format == "csv":
+        def stream_csv():
+            db = SessionLocal()
+            try:
+                rows = iter(_summary_rows(
+                    db, hospid, from_date, to_date, selected_procedure, selected_referrer
+                ))
+                chunks = iter(lambda: list(islice(rows, SUMMARY_CHUNK_SIZE)), [])
+                yield from csv_stream(SUMMARY_FIELDS, chunks)
+            finally:
+                db.close()
+
+        return StreamingResponse(
+            stream_csv(),
+            media_type=CSV_MEDIA_TYPE,
+            headers=attachment(export_filename("summary", "csv")),
+        )
+
+    def stream():
+        # The response outlives the request's get_db session, so the
+        # generator owns its own session for the lifetime of the cursor.
+        db = SessionLocal()
+        try:
+            rows = _summary_rows(
+                db, hospid, from_date, to_date, selected_procedure, selected_referrer
+            )
+            yield "["
+            chunk = []
+            first = True
+            for uid, name, alt_id, mobile, entry_date, referrer_name, procedure_name in rows:
+                item = json.dumps({
+                    "uid": uid,
+                    "Patient_Name": name,
+                    "Alt_Id": alt_id,
+                    "Mobile": mobile,
+                    "Entry_Date": entry_date,
+                    "Referrer_Name": referrer_name,
+                    "Procedure_Name": procedure_name
+                }, default=jsonable_encoder)
+                chunk.append(item if first else "," + item)
+                first = False
+                if len(chunk) >= SUMMARY_CHUNK_SIZE:
+                    yield "".join(chunk)
+                    chunk = []
+            if chunk:
+                yield "".join(chunk)
+            yield "]"
+        finally:
+            db.close()
+
+    return StreamingResponse(stream(), media_type="application/json")
 
 
 @router.get("/user-based-data/")
@@ -56,6 +133,11 @@ def get_user_based_data(
     to_date: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        None,
+        description="next_cursor from the previous page; overrides `page`.",
+    ),
+    with_total: bool = Query(True),
     db: Session = Depends(get_db)
 ):
     # Initial query
@@ -79,18 +161,27 @@ def get_user_based_data(
                 status_code=400
             )
 
-    # Pagination
-    total_count = query.count()
-    registrations = query.offset((page - 1) * page_size).limit(page_size).all()
+    # Pagination: keyset when a cursor is supplied, page/offset otherwise.
+    # entry_date is nullable; undated registrations are listed first.
+    result = paginate(
+        query,
+        (models.PatientRegistration.entry_date, models.PatientRegistration.id),
+        key=lambda reg: (reg.entry_date, reg.id),
+        limit=page_size,
+        cursor=cursor,
+        offset=(page - 1) * page_size,
+        with_total=with_total,
+        nullable_lead=True,
+    )
+    registrations = result["items"]
+
+    pinfo_map = resolve_patient_info(db, registrations)
 
     patientinfo_data = []
     patientreg_data = []
 
     for reg in registrations:
-        pinfo = db.query(models.PatientInfo).filter_by(
-            hospital_id=hospid,
-            uid=reg.uid
-        ).first()
+        pinfo = pinfo_map.get((reg.hospital_id, reg.uid))
         if pinfo:
             patientinfo_data.append({
                 "uid": pinfo.uid,
@@ -109,7 +200,8 @@ def get_user_based_data(
     return {
         "page": page,
         "page_size": page_size,
-        "total": total_count,
+        "total": result["total"],
+        "next_cursor": result["next_cursor"],
         "patientinfoData": patientinfo_data,
         "patientregData": patientreg_data
     }
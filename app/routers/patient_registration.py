@@ -1,21 +1,59 @@
+import os
+import tempfile
+import uuid
 from datetime import date
-from fastapi import APIRouter, Depends, Query, HTTPException
+import aiofiles
+from fastapi import APIRouter, Depends, File, Query, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from redis import RedisError
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from app.models.database import get_db
+from app.models.database import AsyncSessionLocal, SessionLocal, get_async_db, get_db
 from app.models import all_models as models
 from app.schemas import all as schemas
 from app.utils.deps import hospital_or_system_admin_required
 from app.models.all_models import User
+from app.utils.pagination import paginate, paginate_async
+from app.utils.patients import patient_info_join, upsert_patient_visits
+from app.utils.rollups import adjust_hospital_counter
+from app.utils.search import text_match
+from app.utils.serialization import RowSerializer, json_response
+from app.utils.export import (
+    CSV_MEDIA_TYPE,
+    EXPORT_CHUNK_SIZE,
+    XLSX_MEDIA_TYPE,
+    attachment,
+    csv_stream_async,
+    export_filename,
+    write_xlsx,
+)
+from app.tasks.import_tasks import import_registrations
+from app.tasks.queues import redis_conn, report_queue
 
 router = APIRouter()
 
+# Uploaded register files wait here until the import job has read them.
+# Deliberately outside UPLOAD_DIR, which is served publicly at /uploads.
+# The worker reads the file by path, so with workers on other hosts this
+# must be a volume mounted at the same path on the API and worker hosts.
+IMPORT_DIR = os.getenv("IMPORT_DIR", "app/imports")
+IMPORT_CHUNK_SIZE = 1024 * 1024
+IMPORT_JOB_TIMEOUT = int(os.getenv("IMPORT_JOB_TIMEOUT", "14400"))
+
 
 # ============================================================
 # 1️⃣ PATIENT-REGISTRATION APIs
 # ============================================================
 
+registration_rows = RowSerializer(schemas.PatientRegistration, models.PatientRegistration)
+
 @router.get(
     "/patient-registration/",
     response_model=schemas.PaginatedResponse[schemas.PatientRegistration],
@@ -25,24 +63,30 @@ def get_patient_registrations(
     mfid: Optional[str] = Query(None),
     limit: int = Query(50, gt=0, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    with_total: bool = Query(True),
     db: Session = Depends(get_db),
 ):
-    query = db.query(models.PatientRegistration)
+    query = db.query(*registration_rows.columns)
     if hospid:
         query = query.filter(models.PatientRegistration.hospital_id == hospid)
     if mfid:
         query = query.filter(models.PatientRegistration.uid == mfid)
 
-    total = query.count()
-    results = query.offset(offset).limit(limit).all()
-
-    return schemas.PaginatedResponse(
-        total=total,
+    page = paginate(
+        query,
+        (models.PatientRegistration.id,),
+        key=lambda row: (row.id,),
         limit=limit,
+        cursor=cursor,
         offset=offset,
-        items=results,
+        with_total=with_total,
+        descending=False,
     )
 
+    page["items"] = registration_rows.dicts(page["items"])
+    return json_response({"limit": limit, "offset": offset, **page})
+
 
 @router.post("/patient-registration/", response_model=schemas.PatientRegistration)
 def create_patient_registration(
@@ -80,56 +124,31 @@ def create_patient_registration(
     gender = data.get("gender")
 
     # -----------------------------------------------
-    # 3️⃣ UPSERT PatientInfo
+    # 3️⃣ UPSERT PatientInfo + allocate the visit number
     # -----------------------------------------------
-    pinfo = (
-        db.query(models.PatientInfo)
-        .filter(
-            models.PatientInfo.uid == uid,
-            models.PatientInfo.hospital_id == hospital_id,
-        )
-        .first()
-    )
-
-    if pinfo:
-        # Update fields if provided
-        if name:
-            pinfo.name = name
-        if mobile:
-            pinfo.mobile = mobile
-        if age is not None:
-            pinfo.age = age
-        if gender:
-            pinfo.gender = gender
-        if alt_id and alt_id != "--":
-            pinfo.alt_id = alt_id
-
-        # Increment total visits
-        pinfo.total_visits = (pinfo.total_visits or 0) + 1
-
-        # If registered_on was empty, set it once
-        if not pinfo.registered_on:
-            pinfo.registered_on = data.get("procedure_date") or date.today().isoformat()
-
-    else:
-        # Create new patient record
-        registered_on = data.get("procedure_date") or date.today().isoformat()
-
-        pinfo = models.PatientInfo(
-            hospital_id=hospital_id,
-            uid=uid,
-            alt_id=alt_id,
-            name=name or "",
-            mobile=mobile or "",
-            age=age if age is not None else None,
-            gender=gender or "",
-            registered_on=registered_on,
-            total_visits=1,
-        )
-        db.add(pinfo)
+    # One INSERT ... ON CONFLICT ... RETURNING: the total_visits increment
+    # happens under the row lock, so concurrent registrations for the same
+    # uid get distinct, contiguous visit numbers.
+    conn = db.connection()
+    visit_number = upsert_patient_visits(
+        conn,
+        hospital_id,
+        {
+            uid: {
+                "visits": 1,
+                "alt_id": alt_id,
+                "name": name,
+                "mobile": mobile,
+                "age": age,
+                "gender": gender,
+                "registered_on": data.get("procedure_date") or date.today().isoformat(),
+            }
+        },
+    )[uid]
 
-    # 🔹 Decide visit number (after total_visits is correct)
-    visit_number = pinfo.total_visits or 1
+    if visit_number == 1:
+        # First visit: the upsert created the PatientInfo row
+        adjust_hospital_counter(conn, hospital_id, "total_patients", 1)
 
     # -----------------------------------------------
     # 4️⃣ Remove patient-only fields from registration payload
@@ -185,82 +204,188 @@ def delete_patient_registration(
     db: Session = Depends(get_db),
     current_user: User = Depends(hospital_or_system_admin_required),
 ):
-    deleted = db.query(models.PatientRegistration).filter_by(id=id).delete()
-    db.commit()
+    # Delete through the session (not query.delete()) so the daily
+    # rollups see the removal
+    reg = db.query(models.PatientRegistration).filter_by(id=id).first()
+    if reg:
+        db.delete(reg)
+        db.commit()
     return {"message": "Patient registration deleted", "id": id}
 
 
 
 # ============================================================
-# 2️⃣ FIND-PATIENTS API
+# 1️⃣b BULK IMPORT
 # ============================================================
 
-@router.get("/find-patients/")
-def find_patients(
-    mfid: Optional[str] = Query(None),
-    alt_id: Optional[str] = Query(None),
-    patient_name: Optional[str] = Query(None),
-    doctor_name: Optional[str] = Query(None),
-    procedure_name: Optional[str] = Query(None),
-    hospid: Optional[int] = Query(None),
-    limit: int = Query(50, gt=0, le=100),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+@router.post("/patient-registration/import", status_code=202)
+async def import_patient_registrations(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(
+        None, pattern="^(csv|ndjson)$", description="Defaults from the file extension"
+    ),
+    hospid: Optional[int] = Query(None, description="Target hospital (system admin only)"),
     current_user: User = Depends(hospital_or_system_admin_required),
 ):
     """
-    Unified flexible search combining:
-    - mfid
-    - alt_id
-    - patient_name (PatientInfo)
-    - doctor_name
-    - procedure_name
+    Bulk-load a register as CSV (header row) or NDJSON, one registration
+    per row with the create-endpoint fields plus optional name, mobile,
+    age, gender and entry_date. The file is spooled to disk and imported
+    by a background job; poll GET /patient-registration/import/{job_id}.
     """
+    if current_user.is_sadmin and hospid:
+        hospital_id = hospid
+    elif current_user.hspId:
+        hospital_id = int(current_user.hspId)
+    else:
+        raise HTTPException(status_code=400, detail="User is not linked to any hospital/branch")
 
-    query = (
-        db.query(models.PatientRegistration, models.PatientInfo)
-        .join(
-            models.PatientInfo,
-            models.PatientInfo.uid == models.PatientRegistration.uid,
-            isouter=True,
+    fmt = format or ("ndjson" if (file.filename or "").lower().endswith((".ndjson", ".jsonl")) else "csv")
+
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    job_id = f"import-{uuid.uuid4().hex}"
+    path = os.path.join(IMPORT_DIR, f"{job_id}.{fmt}")
+    try:
+        async with aiofiles.open(path, "wb") as f:
+            while chunk := await file.read(IMPORT_CHUNK_SIZE):
+                await f.write(chunk)
+    finally:
+        await file.close()
+
+    try:
+        job = await run_in_threadpool(
+            report_queue.enqueue,
+            import_registrations,
+            path,
+            hospital_id,
+            fmt,
+            job_id=job_id,
+            job_timeout=IMPORT_JOB_TIMEOUT,
+            meta={"hospital_id": hospital_id},
         )
-    )
+    except RedisError as e:
+        os.remove(path)
+        raise HTTPException(status_code=503, detail=f"Could not queue import: {str(e)}")
+
+    return {"job_id": job.id, "status": "queued", "format": fmt, "hospital_id": hospital_id}
+
+
+@router.get("/patient-registration/import/{job_id}")
+def get_import_status(
+    job_id: str,
+    current_user: User = Depends(hospital_or_system_admin_required),
+):
+    try:
+        job = Job.fetch(job_id, connection=redis_conn)
+    except NoSuchJobError:
+        raise HTTPException(status_code=404, detail="Import job not found")
+
+    hospital_id = job.meta.get("hospital_id")
+    if not current_user.is_sadmin and str(hospital_id) != str(current_user.hspId):
+        raise HTTPException(status_code=404, detail="Import job not found")
+
+    return {
+        "job_id": job.id,
+        "status": job.get_status(),
+        "hospital_id": hospital_id,
+        "processed": job.meta.get("processed", 0),
+        "imported": job.meta.get("imported", 0),
+        "failed": job.meta.get("failed", 0),
+        "errors": job.meta.get("errors", []),
+    }
+
+
+
+# ============================================================
+# 2️⃣ FIND-PATIENTS API
+# ============================================================
 
+def _find_patients_filters(
+    query,
+    current_user: User,
+    hospid: Optional[int],
+    mfid: Optional[str],
+    alt_id: Optional[str],
+    patient_name: Optional[str],
+    doctor_name: Optional[str],
+    procedure_name: Optional[str],
+    match: str,
+):
+    """find-patients filters and hospital scoping, shared with the export."""
     # Hospital restrictions
     if not current_user.is_sadmin:
-        query = query.filter(
+        query = query.where(
             models.PatientRegistration.hospital_id == int(current_user.hspId)
         )
     elif hospid:
-        query = query.filter(models.PatientRegistration.hospital_id == hospid)
+        query = query.where(models.PatientRegistration.hospital_id == hospid)
 
     # Filters
     if mfid:
-        query = query.filter(models.PatientRegistration.uid == mfid)
+        query = query.where(models.PatientRegistration.uid == mfid)
 
     if alt_id:
-        query = query.filter(models.PatientRegistration.alt_id == alt_id)
+        query = query.where(models.PatientRegistration.alt_id == alt_id)
 
     if patient_name:
-        query = query.filter(models.PatientInfo.name.ilike(f"%{patient_name}%"))
+        query = query.where(text_match(models.PatientInfo.name, patient_name, match))
 
     if doctor_name:
-        query = query.filter(models.PatientRegistration.doctor_name.ilike(f"%{doctor_name}%"))
+        query = query.where(text_match(models.PatientRegistration.doctor_name, doctor_name, match))
 
     if procedure_name:
-        query = query.filter(models.PatientRegistration.procedure_name.ilike(f"%{procedure_name}%"))
+        query = query.where(text_match(models.PatientRegistration.procedure_name, procedure_name, match))
+
+    return query
 
-    total = query.count()
 
-    rows = (
-        query.order_by(models.PatientRegistration.id.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
+@router.get("/find-patients/")
+async def find_patients(
+    mfid: Optional[str] = Query(None),
+    alt_id: Optional[str] = Query(None),
+    patient_name: Optional[str] = Query(None),
+    doctor_name: Optional[str] = Query(None),
+    procedure_name: Optional[str] = Query(None),
+    match: str = Query("contains", pattern="^(contains|prefix)$"),
+    hospid: Optional[int] = Query(None),
+    limit: int = Query(50, gt=0, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    with_total: bool = Query(True),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(hospital_or_system_admin_required),
+):
+    """
+    Unified flexible search combining:
+    - mfid
+    - alt_id
+    - patient_name (PatientInfo)
+    - doctor_name
+    - procedure_name
+
+    Name filters match anywhere in the value by default; match=prefix
+    restricts them to the start of the value for typeahead.
+    """
+
+    query = _find_patients_filters(
+        select(models.PatientRegistration, models.PatientInfo)
+        .join(models.PatientInfo, patient_info_join(), isouter=True),
+        current_user, hospid, mfid, alt_id, patient_name, doctor_name, procedure_name, match,
+    )
+
+    page = await paginate_async(
+        db,
+        query,
+        (models.PatientRegistration.id,),
+        key=lambda row: (row[0].id,),
+        limit=limit,
+        cursor=cursor,
+        offset=offset,
+        with_total=with_total,
     )
 
     results = []
-    for reg, pinfo in rows:
+    for reg, pinfo in page["items"]:
         results.append(
             {
                 "Registration_Id": reg.id,
@@ -285,22 +410,120 @@ def find_patients(
         )
 
     return {
-        "total": total,
+        "total": page["total"],
         "limit": limit,
         "offset": offset,
         "items": results,
+        "next_cursor": page["next_cursor"],
     }
 
 
+# Export columns, in find-patients' field names and order
+EXPORT_COLUMNS = [
+    ("Registration_Id", models.PatientRegistration.id),
+    ("Hospital_Id", models.PatientRegistration.hospital_id),
+    ("uid", models.PatientRegistration.uid),
+    ("Alt_Id", models.PatientRegistration.alt_id),
+    ("Status", models.PatientRegistration.status),
+    ("Procedure_Name", models.PatientRegistration.procedure_name),
+    ("Doctor_Name", models.PatientRegistration.doctor_name),
+    ("Referrer_Name", models.PatientRegistration.referrer_name),
+    ("Nurse_Name", models.PatientRegistration.nurse_name),
+    ("Procedure_Date", models.PatientRegistration.procedure_date),
+    ("Entry_Date", models.PatientRegistration.entry_date),
+    ("Patient_Name", models.PatientInfo.name),
+    ("Mobile", models.PatientInfo.mobile),
+    ("Age", models.PatientInfo.age),
+    ("Gender", models.PatientInfo.gender),
+    ("Registered_On", models.PatientInfo.registered_on),
+    ("Total_Visits", models.PatientInfo.total_visits),
+]
+
+
+@router.get("/find-patients/export")
+async def export_patients(
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    mfid: Optional[str] = Query(None),
+    alt_id: Optional[str] = Query(None),
+    patient_name: Optional[str] = Query(None),
+    doctor_name: Optional[str] = Query(None),
+    procedure_name: Optional[str] = Query(None),
+    match: str = Query("contains", pattern="^(contains|prefix)$"),
+    hospid: Optional[int] = Query(None),
+    from_date: Optional[date] = Query(None, description="Entry date, inclusive"),
+    to_date: Optional[date] = Query(None, description="Entry date, inclusive"),
+    current_user: User = Depends(hospital_or_system_admin_required),
+):
+    """
+    Every find-patients match as one CSV or XLSX download. Rows are read
+    through a server-side cursor in EXPORT_CHUNK_SIZE partitions and
+    written out as they arrive, so memory does not grow with the result.
+    """
+    query = _find_patients_filters(
+        select(*(column for _, column in EXPORT_COLUMNS))
+        .select_from(models.PatientRegistration)
+        .join(models.PatientInfo, patient_info_join(), isouter=True),
+        current_user, hospid, mfid, alt_id, patient_name, doctor_name, procedure_name, match,
+    )
+    if from_date:
+        query = query.where(models.PatientRegistration.entry_date >= from_date)
+    if to_date:
+        query = query.where(models.PatientRegistration.entry_date <= to_date)
+    query = query.order_by(models.PatientRegistration.id).execution_options(
+        yield_per=EXPORT_CHUNK_SIZE
+    )
+    header = [label for label, _ in EXPORT_COLUMNS]
+
+    if format == "xlsx":
+        filename = export_filename("patients", "xlsx")
+        path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4().hex}.xlsx")
+
+        def build():
+            # The workbook is assembled on disk by a worker thread with its
+            # own session, then sent as a file
+            db = SessionLocal()
+            try:
+                write_xlsx(path, header, db.execute(query).partitions(), "Patients")
+            finally:
+                db.close()
+
+        try:
+            await run_in_threadpool(build)
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return FileResponse(
+            path,
+            media_type=XLSX_MEDIA_TYPE,
+            filename=filename,
+            background=BackgroundTask(os.remove, path),
+        )
+
+    async def partitions():
+        # The response outlives the request's session dependencies, so the
+        # stream owns its session for the lifetime of the cursor
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                yield rows
+
+    return StreamingResponse(
+        csv_stream_async(header, partitions()),
+        media_type=CSV_MEDIA_TYPE,
+        headers=attachment(export_filename("patients", "csv")),
+    )
+
+
 # ============================================================
 # 3️⃣ PATIENT VISITS API
 #     One patient (by mfid) → master info + all visits
 # ============================================================
 
 @router.get("/patient-visits/{mfid}")
-def get_patient_visits(
+async def get_patient_visits(
     mfid: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(hospital_or_system_admin_required),
 ):
     """
@@ -311,33 +534,34 @@ def get_patient_visits(
     """
 
     # 1️⃣ Patient master
-    pinfo_query = db.query(models.PatientInfo).filter(models.PatientInfo.uid == mfid)
+    pinfo_query = select(models.PatientInfo).where(models.PatientInfo.uid == mfid)
 
     if not current_user.is_sadmin:
-        pinfo_query = pinfo_query.filter(
+        pinfo_query = pinfo_query.where(
             models.PatientInfo.hospital_id == int(current_user.hspId)
         )
 
-    pinfo = pinfo_query.first()
+    pinfo = (await db.execute(pinfo_query.limit(1))).scalars().first()
     if not pinfo:
         raise HTTPException(status_code=404, detail="Patient not found for this MF ID")
 
     # 2️⃣ All registrations (visits)
-    regs_query = db.query(models.PatientRegistration).filter(
+    regs_query = select(models.PatientRegistration).where(
         models.PatientRegistration.uid == mfid
     )
 
     if not current_user.is_sadmin:
-        regs_query = regs_query.filter(
+        regs_query = regs_query.where(
             models.PatientRegistration.hospital_id == int(current_user.hspId)
         )
 
     regs = (
-        regs_query
-        .order_by(models.PatientRegistration.visit_id.desc(),
-                  models.PatientRegistration.id.desc())
-        .all()
-    )
+        await db.execute(
+            regs_query
+            .order_by(models.PatientRegistration.visit_id.desc(),
+                      models.PatientRegistration.id.desc())
+        )
+    ).scalars().all()
 
     visits_count = len(regs)
 
@@ -1,43 +1,467 @@
 # app/routers/recordings.py
 
-from typing import List
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse, JSONResponse
-import shutil
+import asyncio
+import hashlib
+import json
 import os
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+import aiofiles
+import aiofiles.os
+from fastapi import APIRouter, Depends, Form, Header, HTTPException, Query, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
+from redis import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import all_models as models
+from app.models.database import get_async_db, get_db
+from app.schemas import all as schemas
+from app.tasks.offload_tasks import enqueue_offload
+from app.utils.pagination import paginate_async
+from app.utils.storage import get_storage
 
 router = APIRouter()
 
 UPLOAD_DIR = "app/uploads/recordings"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# In-progress resumable uploads: <upload_id>.part + <upload_id>.json
+PARTIAL_DIR = os.path.join(UPLOAD_DIR, ".partial")
+os.makedirs(PARTIAL_DIR, exist_ok=True)
+
+# Bytes copied per iteration when moving upload bodies to disk
+RECORDING_CHUNK_SIZE = 1024 * 1024
+
+# Largest body one resumable-upload PATCH may carry, so an upload without
+# a declared size cannot fill the disk in a single request
+RECORDING_MAX_CHUNK_BYTES = int(os.getenv("RECORDING_MAX_CHUNK_BYTES", str(64 * 1024 * 1024)))
+
+# Serialises appends per upload within this process
+_upload_locks = {}
+
+# nginx internal location mapped onto UPLOAD_DIR, for sendfile playback
+ACCEL_REDIRECT_PREFIX = os.getenv("RECORDINGS_ACCEL_REDIRECT")
+
+
+async def _catalog_recording(
+    db: AsyncSession,
+    filename: str,
+    size_bytes: int,
+    hospital_id: Optional[int] = None,
+    uid: Optional[str] = None,
+    visit_id: Optional[int] = None,
+    duration_seconds: Optional[float] = None,
+) -> models.Recording:
+    """Insert or refresh the catalog row for a file now on disk."""
+    result = await db.execute(
+        select(models.Recording).where(models.Recording.filename == filename)
+    )
+    recording = result.scalars().first()
+    if recording is None:
+        recording = models.Recording(filename=filename)
+        db.add(recording)
+
+    recording.size_bytes = size_bytes
+    recording.hospital_id = hospital_id
+    recording.uid = uid
+    recording.visit_id = visit_id
+    recording.duration_seconds = duration_seconds
+    await db.commit()
+    await db.refresh(recording)
+    return recording
+
+
+def _offload_recording(filename: str) -> None:
+    """Queue the move to object storage; a no-op with local storage."""
+    try:
+        enqueue_offload(os.path.join(UPLOAD_DIR, filename), f"recordings/{filename}")
+    except RedisError as e:
+        print(f"[recordings] Could not queue offload for {filename}: {e}")
+
+
 @router.post("/save-recording")
-async def save_recording(video: UploadFile = File(...)):
-    file_path = os.path.join(UPLOAD_DIR, video.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(video.file, buffer)
-    return {"message": "Recording saved", "filename": video.filename}
+async def save_recording(
+    video: UploadFile = File(...),
+    hospital_id: Optional[int] = Form(None),
+    uid: Optional[str] = Form(None),
+    visit_id: Optional[int] = Form(None),
+    duration: Optional[float] = Form(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    filename = os.path.basename(video.filename)
+    file_path = os.path.join(UPLOAD_DIR, filename)
+    size = 0
+    async with aiofiles.open(file_path, "wb") as buffer:
+        while chunk := await video.read(RECORDING_CHUNK_SIZE):
+            await buffer.write(chunk)
+            size += len(chunk)
+
+    await _catalog_recording(db, filename, size, hospital_id, uid, visit_id, duration)
+    await run_in_threadpool(_offload_recording, filename)
+    return {"message": "Recording saved", "filename": filename}
+
+
+# ============================================================
+# Resumable uploads (init → append chunks at offsets → complete)
+# ============================================================
+
+def _upload_key(upload_id: str) -> str:
+    """Canonical (hex) form of an upload id, so every spelling maps to one upload."""
+    try:
+        return uuid.UUID(upload_id).hex
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+
+def _partial_paths(upload_id: str):
+    base = os.path.join(PARTIAL_DIR, _upload_key(upload_id))
+    return f"{base}.part", f"{base}.json"
+
+
+async def _upload_lock(upload_id: str) -> Tuple[str, asyncio.Lock]:
+    """
+    The lock serialising writes to an upload, keyed by its canonical id.
+    Unknown ids 404 before a lock is created, so they cannot pile up.
+    """
+    key = _upload_key(upload_id)
+    _, meta_path = _partial_paths(key)
+    if not await aiofiles.os.path.exists(meta_path):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return key, _upload_locks.setdefault(key, asyncio.Lock())
+
+
+async def _load_upload(upload_id: str):
+    part_path, meta_path = _partial_paths(upload_id)
+    if not await aiofiles.os.path.exists(meta_path):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    async with aiofiles.open(meta_path, "r") as f:
+        meta = json.loads(await f.read())
+    offset = (await aiofiles.os.stat(part_path)).st_size
+    return part_path, meta_path, meta, offset
+
+
+@router.post("/recordings/uploads", status_code=201)
+async def init_recording_upload(
+    filename: str = Query(...),
+    size: Optional[int] = Query(None, ge=0, description="Total bytes, if known up front"),
+    hospital_id: Optional[int] = Query(None),
+    uid: Optional[str] = Query(None),
+    visit_id: Optional[int] = Query(None),
+):
+    """
+    Start a resumable upload. `size` may be omitted while the procedure is
+    still being recorded; the upload is then closed by /complete.
+    """
+    upload_id = uuid.uuid4().hex
+    part_path, meta_path = _partial_paths(upload_id)
+    meta = {
+        "filename": os.path.basename(filename),
+        "size": size,
+        "hospital_id": hospital_id,
+        "uid": uid,
+        "visit_id": visit_id,
+    }
+
+    async with aiofiles.open(part_path, "wb"):
+        pass
+    async with aiofiles.open(meta_path, "w") as f:
+        await f.write(json.dumps(meta))
+
+    return {"upload_id": upload_id, "offset": 0, **meta}
+
+
+@router.get("/recordings/uploads/{upload_id}")
+async def get_recording_upload(upload_id: str):
+    """Current offset, so a client can resume after a dropped connection."""
+    _, _, meta, offset = await _load_upload(upload_id)
+    return {"upload_id": upload_id, "offset": offset, **meta}
+
+
+@router.patch("/recordings/uploads/{upload_id}")
+async def append_recording_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    chunk_sha256: Optional[str] = Header(None, alias="X-Chunk-SHA256"),
+):
+    """
+    Append the raw request body at `offset`, which must equal the bytes
+    already received. When X-Chunk-SHA256 is sent and does not match, the
+    chunk is discarded and the offset stays where it was. A body larger
+    than RECORDING_MAX_CHUNK_BYTES, or running past the declared size, is
+    cut off as soon as it crosses the limit and rejected with 413.
+    """
+    _, lock = await _upload_lock(upload_id)
+    async with lock:
+        part_path, _, meta, current = await _load_upload(upload_id)
+        if offset != current:
+            return JSONResponse(
+                status_code=409,
+                content={"detail": "Offset mismatch", "offset": current},
+            )
+
+        limit, too_large = RECORDING_MAX_CHUNK_BYTES, "Chunk exceeds RECORDING_MAX_CHUNK_BYTES"
+        if meta["size"] is not None and meta["size"] - current < limit:
+            limit, too_large = meta["size"] - current, "Chunk exceeds declared size"
+
+        hasher = hashlib.sha256()
+        written = 0
+        async with aiofiles.open(part_path, "ab") as f:
+            async for chunk in request.stream():
+                written += len(chunk)
+                if written > limit:
+                    break
+                hasher.update(chunk)
+                await f.write(chunk)
+
+        if written > limit:
+            await asyncio.to_thread(os.truncate, part_path, current)
+            return JSONResponse(
+                status_code=413,
+                content={"detail": too_large, "offset": current},
+            )
+
+        new_offset = current + written
+        if chunk_sha256 and hasher.hexdigest() != chunk_sha256.lower():
+            await asyncio.to_thread(os.truncate, part_path, current)
+            return JSONResponse(
+                status_code=400,
+                content={"detail": "Chunk checksum mismatch", "offset": current},
+            )
+
+    return {"upload_id": upload_id, "offset": new_offset}
+
+
+@router.post("/recordings/uploads/{upload_id}/complete")
+async def complete_recording_upload(
+    upload_id: str,
+    duration: Optional[float] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    key, lock = await _upload_lock(upload_id)
+    async with lock:
+        part_path, meta_path, meta, offset = await _load_upload(upload_id)
+        if meta["size"] is not None and offset != meta["size"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete: {offset} of {meta['size']} bytes received",
+            )
+
+        file_path = os.path.join(UPLOAD_DIR, meta["filename"])
+        await aiofiles.os.replace(part_path, file_path)
+        await aiofiles.os.remove(meta_path)
+    _upload_locks.pop(key, None)
+
+    await _catalog_recording(
+        db, meta["filename"], offset,
+        meta.get("hospital_id"), meta.get("uid"), meta.get("visit_id"), duration,
+    )
+    await run_in_threadpool(_offload_recording, meta["filename"])
+    return {"message": "Recording saved", "filename": meta["filename"], "size": offset}
+
+
+@router.delete("/recordings/uploads/{upload_id}")
+async def abort_recording_upload(upload_id: str):
+    part_path, meta_path, _, _ = await _load_upload(upload_id)
+    await aiofiles.os.remove(part_path)
+    await aiofiles.os.remove(meta_path)
+    _upload_locks.pop(_upload_key(upload_id), None)
+    return Response(status_code=204)
 
 
 @router.get("/recordings", response_model=List[str])
-async def list_recordings():
-    files = [f for f in os.listdir(UPLOAD_DIR) if f.endswith(".webm")]
-    return files
+async def list_recordings(
+    hospid: Optional[int] = Query(None),
+    mfid: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # As before the catalog existed: the player only lists .webm recordings
+    query = select(models.Recording.filename).where(models.Recording.filename.like("%.webm"))
+    if hospid:
+        query = query.where(models.Recording.hospital_id == hospid)
+    if mfid:
+        query = query.where(models.Recording.uid == mfid)
+
+    result = await db.execute(query.order_by(models.Recording.id))
+    return result.scalars().all()
+
+
+@router.get("/recordings/catalog", response_model=schemas.PaginatedResponse[schemas.Recording])
+async def get_recording_catalog(
+    hospid: Optional[int] = Query(None),
+    mfid: Optional[str] = Query(None),
+    visit_id: Optional[int] = Query(None),
+    limit: int = Query(50, gt=0, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    with_total: bool = Query(True),
+    db: AsyncSession = Depends(get_async_db),
+):
+    query = select(models.Recording)
+    if hospid:
+        query = query.where(models.Recording.hospital_id == hospid)
+    if mfid:
+        query = query.where(models.Recording.uid == mfid)
+    if visit_id:
+        query = query.where(models.Recording.visit_id == visit_id)
+
+    page = await paginate_async(
+        db,
+        query,
+        (models.Recording.id,),
+        key=lambda rec: (rec.id,),
+        limit=limit,
+        cursor=cursor,
+        offset=offset,
+        with_total=with_total,
+    )
+    return schemas.PaginatedResponse(limit=limit, offset=offset, **page)
+
+
+# ============================================================
+# Playback (byte ranges + conditional requests)
+# ============================================================
+
+def _etag(st: os.stat_result) -> str:
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def _not_modified(request: Request, etag: str, st: os.stat_result) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(st.st_mtime) <= since
+    return False
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single "bytes=" range. Returns None for
+    headers we serve as a full 200 (multi-range, other units) and raises
+    416 for ranges outside the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            # suffix range: the final N bytes
+            length = int(last)
+            if length <= 0:
+                raise ValueError
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, min(end, size - 1)
+
+
+async def _read_range(file_path: str, start: int, end: int):
+    async with aiofiles.open(file_path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(RECORDING_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
 
 
 @router.get("/recordings/{filename}")
-async def get_recording(filename: str):
+async def get_recording(filename: str, request: Request):
+    """
+    Serve a recording with byte-range (206) and conditional (304) support
+    so players can seek without re-downloading.
+
+    With RECORDINGS_ACCEL_REDIRECT set (e.g. "/protected-recordings/"),
+    the bytes are handed to nginx via X-Accel-Redirect and sent with
+    sendfile; otherwise full responses use FileResponse, which is
+    zero-copy on servers implementing the ASGI pathsend extension.
+    """
+    filename = os.path.basename(filename)
     file_path = os.path.join(UPLOAD_DIR, filename)
-    if os.path.exists(file_path):
-        return FileResponse(file_path, media_type="video/webm")
-    return JSONResponse(status_code=404, content={"detail": "File not found"})
+    try:
+        st = await aiofiles.os.stat(file_path)
+    except FileNotFoundError:
+        storage = get_storage()
+        if not storage.is_local:
+            # Offloaded: the object store serves ranges itself
+            return RedirectResponse(storage.url(f"recordings/{filename}"))
+        return JSONResponse(status_code=404, content={"detail": "File not found"})
+
+    etag = _etag(st)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+    }
+
+    if _not_modified(request, etag, st):
+        return Response(status_code=304, headers=headers)
+
+    if ACCEL_REDIRECT_PREFIX:
+        headers["X-Accel-Redirect"] = ACCEL_REDIRECT_PREFIX + quote(filename)
+        return Response(media_type="video/webm", headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        byte_range = _parse_range(range_header, st.st_size)
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                _read_range(file_path, start, end),
+                status_code=206,
+                media_type="video/webm",
+                headers=headers,
+            )
+
+    return FileResponse(file_path, media_type="video/webm", headers=headers, stat_result=st)
 
 
 @router.delete("/recordings/{filename}")
-def delete_recording(filename: str):
+def delete_recording(filename: str, db: Session = Depends(get_db)):
+    filename = os.path.basename(filename)
     file_path = os.path.join(UPLOAD_DIR, filename)
-    if not os.path.exists(file_path):
+    recording = db.query(models.Recording).filter_by(filename=filename).first()
+    on_disk = os.path.exists(file_path)
+    if not on_disk and recording is None:
         raise HTTPException(status_code=404, detail="Recording not found")
 
-    os.remove(file_path)
-    return {"message": "Recording deleted"}
\ No newline at end of file
+    if on_disk:
+        os.remove(file_path)
+    storage = get_storage()
+    if not storage.is_local:
+        storage.delete(f"recordings/{filename}")
+    if recording is not None:
+        db.delete(recording)
+        db.commit()
+    return {"message": "Recording deleted"}
@@ -1,39 +1,157 @@
 # app/routers/snapshots.py
 
 import base64
+import hashlib
+import json
 import os
 import time
 from datetime import datetime
 from typing import Optional
-from fastapi import APIRouter, Query, UploadFile, Depends, HTTPException, status, Body, File
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+import aiofiles
+from fastapi import APIRouter, Query, UploadFile, Depends, HTTPException, status, Body, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse
+from redis import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models import all_models as models
 from app.schemas import all as schemas
-from app.models.database import get_db
+from app.models.database import get_async_db, get_db
+from app.utils.pagination import paginate_async
+from app.utils.serialization import RowSerializer, json_response
+from app.tasks.queues import thumbnail_queue
+from app.tasks.thumbnail_tasks import generate_snapshot_thumbnails, rendition_srcs, upload_path
+from app.utils.storage import get_storage, key_for_src
 from dotenv import load_dotenv
 load_dotenv()
 
 router = APIRouter()
 
 
+# Columns of schemas.Snapshots, serialized without per-row validation
+snapshot_rows = RowSerializer(schemas.Snapshots, models.Snapshots)
+
+# Bytes read from the multipart body and written to disk per iteration
+SNAPSHOT_CHUNK_SIZE = 1024 * 1024
+
+# Where clients fetch a snapshot's bytes (this router is mounted at /api)
+SNAPSHOT_FILE_URL = "/api/snapshots/{id}/file"
+
+
+def _snapshot_paths(filename: str):
+    """Public /uploads URL and absolute disk path for a snapshot file."""
+    filename = os.path.basename(filename)  # never let clients pick a directory
+    file_src = f"/uploads/snapshots/{filename}"
+    abs_save_path = os.path.join(os.getenv("UPLOAD_DIR"), "snapshots", filename)
+    os.makedirs(os.path.dirname(abs_save_path), exist_ok=True)
+    return file_src, abs_save_path
+
+
+def _enqueue_thumbnails(snapshot_id: int) -> None:
+    """
+    Queue rendition generation. The snapshot keeps file_thumbnail=file_src
+    until the worker finishes, so a Redis outage only costs the thumbnail.
+    """
+    try:
+        thumbnail_queue.enqueue(generate_snapshot_thumbnails, snapshot_id)
+    except RedisError as e:
+        print(f"[snapshots] Could not queue thumbnails for {snapshot_id}: {e}")
+
+
+def public_snapshot(item: dict) -> dict:
+    """
+    Point file_src, file_thumbnail and the renditions of a serialized
+    snapshot at /snapshots/{id}/file. The stored /uploads paths stop
+    resolving once the offload worker moves the files to object storage;
+    that endpoint redirects to wherever the bytes are.
+    """
+    url = SNAPSHOT_FILE_URL.format(id=item["id"])
+    renditions = json.loads(item.get("thumbnail_renditions") or "{}")
+    thumbnail = item.get("file_thumbnail")
+    if thumbnail:
+        size = next((size for size, src in renditions.items() if src == thumbnail), None)
+        item["file_thumbnail"] = f"{url}?size={size}" if size else url
+    if item.get("file_src"):
+        item["file_src"] = url
+    if renditions:
+        item["thumbnail_renditions"] = json.dumps({size: f"{url}?size={size}" for size in renditions})
+    return item
+
+
+def _snapshot_row(file_src: str, content_hash: str, **fields) -> models.Snapshots:
+    return models.Snapshots(
+        file_src=file_src,
+        file_thumbnail=file_src,  # optional: set to same or blank
+        content_hash=content_hash,
+        procedure_datetime=fields.pop("procedure_datetime", None) or datetime.utcnow().isoformat(),
+        **fields,
+    )
+
+
+# POST /api/save-snapshots/upload (multipart, streamed to disk)
+@router.post("/save-snapshots/upload", response_model=schemas.Snapshots)
+async def upload_snapshot(
+    file: UploadFile = File(...),
+    hospital_id: int = Form(...),
+    uid: str = Form(...),
+    visit_id: int = Form(...),
+    procedure_id: int = Form(0),
+    procedure_datetime: Optional[str] = Form(None),
+    file_type: str = Form("image/png"),
+    file_status: str = Form("main"),
+    annotation_data: str = Form(""),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Raw image bytes as multipart/form-data. The file is copied to disk in
+    SNAPSHOT_CHUNK_SIZE pieces with non-blocking writes while its SHA-256
+    is computed, so a frame is never held in memory as a whole.
+    """
+    filename = file.filename or f"snapshot_{int(time.time())}.png"
+    file_src, abs_save_path = _snapshot_paths(filename)
+
+    hasher = hashlib.sha256()
+    try:
+        async with aiofiles.open(abs_save_path, "wb") as f:
+            while chunk := await file.read(SNAPSHOT_CHUNK_SIZE):
+                hasher.update(chunk)
+                await f.write(chunk)
+    except OSError as e:
+        if os.path.exists(abs_save_path):
+            os.remove(abs_save_path)
+        raise HTTPException(status_code=500, detail=f"Snapshot upload failed: {str(e)}")
+    finally:
+        await file.close()
+
+    new_snapshot = _snapshot_row(
+        file_src,
+        hasher.hexdigest(),
+        hospital_id=hospital_id,
+        uid=uid,
+        visit_id=visit_id,
+        procedure_id=procedure_id,
+        procedure_datetime=procedure_datetime,
+        file_type=file_type,
+        file_status=file_status,
+        annotation_data=annotation_data,
+    )
+    db.add(new_snapshot)
+    await db.commit()
+    await db.refresh(new_snapshot)
+
+    await run_in_threadpool(_enqueue_thumbnails, new_snapshot.id)
+    return json_response(public_snapshot(snapshot_rows.dict_of(new_snapshot)))
+
+
 # POST /api/save-snapshots/ (base64 JSON upload)
+# Kept for existing clients; new clients should use /save-snapshots/upload.
 @router.post("/save-snapshots/", response_model=schemas.Snapshots)
 def upload_snapshot_base64(
     payload: dict = Body(...),
     db: Session = Depends(get_db)
 ):
     try:
-        hospital_id = payload.get("hospital_id")
-        uid = payload.get("uid")
-        visit_id = payload.get("visit_id")
-        procedure_id = payload.get("procedure_id", 0)
-        procedure_datetime = payload.get("procedure_datetime") or datetime.utcnow().isoformat()
-
-        file_type = payload.get("file_type", "image/png")
-        file_status = payload.get("file_status", "main")
-        annotation_data = payload.get("annotation_data", "")
         filename = payload.get("filename", f"snapshot_{int(time.time())}.png")
         base64_image = payload.get("Img")
 
@@ -43,30 +161,29 @@ def upload_snapshot_base64(
         _, imgstr = base64_image.split(';base64,') if ';base64,' in base64_image else ('', base64_image)
         img_data = base64.b64decode(imgstr)
 
-        file_src = f"/uploads/snapshots/{filename}"
-        abs_save_path = os.path.join(os.getenv("UPLOAD_DIR"),"snapshots", filename)
-        os.makedirs(os.path.dirname(abs_save_path), exist_ok=True)
+        file_src, abs_save_path = _snapshot_paths(filename)
 
         with open(abs_save_path, "wb") as f:
             f.write(img_data)
 
-        new_snapshot = models.Snapshots(
-            hospital_id=hospital_id,
-            uid=uid,
-            visit_id=visit_id,
-            procedure_id=procedure_id,
-            procedure_datetime=procedure_datetime,
-            file_src=file_src,
-            file_thumbnail=file_src,  # optional: set to same or blank
-            file_type=file_type,
-            file_status=file_status,
-            annotation_data=annotation_data
+        new_snapshot = _snapshot_row(
+            file_src,
+            hashlib.sha256(img_data).hexdigest(),
+            hospital_id=payload.get("hospital_id"),
+            uid=payload.get("uid"),
+            visit_id=payload.get("visit_id"),
+            procedure_id=payload.get("procedure_id", 0),
+            procedure_datetime=payload.get("procedure_datetime"),
+            file_type=payload.get("file_type", "image/png"),
+            file_status=payload.get("file_status", "main"),
+            annotation_data=payload.get("annotation_data", ""),
         )
         db.add(new_snapshot)
         db.commit()
         db.refresh(new_snapshot)
 
-        return new_snapshot
+        _enqueue_thumbnails(new_snapshot.id)
+        return json_response(public_snapshot(snapshot_rows.dict_of(new_snapshot)))
 
 
     except Exception as e:
@@ -74,29 +191,68 @@ def upload_snapshot_base64(
 
 # GET snapshots
 @router.get("/snapshots/", response_model=dict)
-def get_snapshots(
+async def get_snapshots(
     hospid: Optional[int] = Query(None),
     mfid: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    with_total: bool = Query(True),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(models.Snapshots)
+    query = select(*snapshot_rows.columns)
     if hospid:
-        query = query.filter(models.Snapshots.hospital_id == hospid)
+        query = query.where(models.Snapshots.hospital_id == hospid)
     if mfid:
-        query = query.filter(models.Snapshots.uid == mfid)
+        query = query.where(models.Snapshots.uid == mfid)
 
-    total = query.count()
-    items = query.offset((page - 1) * page_size).limit(page_size).all()
+    result = await paginate_async(
+        db,
+        query,
+        (models.Snapshots.id,),
+        key=lambda row: (row.id,),
+        limit=page_size,
+        cursor=cursor,
+        offset=(page - 1) * page_size,
+        with_total=with_total,
+        descending=False,
+    )
 
-    # ✅ serialize items safely
-    return JSONResponse(content=jsonable_encoder({
+    return json_response({
         "page": page,
         "page_size": page_size,
-        "total": total,
-        "mediafiles": items
-    }))
+        "total": result["total"],
+        "mediafiles": [public_snapshot(item) for item in snapshot_rows.dicts(result["items"])],
+        "next_cursor": result["next_cursor"],
+    })
+
+@router.get("/snapshots/{id}/file")
+def get_snapshot_file(
+    id: int,
+    size: Optional[int] = Query(None, description="Rendition size; omit for the original"),
+    db: Session = Depends(get_db),
+):
+    """
+    Redirect to the image wherever it is stored: the /uploads mount for
+    local storage, a short-lived presigned URL for object storage.
+    """
+    snap = db.query(models.Snapshots).filter_by(id=id).first()
+    if not snap:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+
+    src = snap.file_src
+    if size is not None:
+        renditions = json.loads(snap.thumbnail_renditions or "{}")
+        src = renditions.get(str(size))
+        if src is None:
+            raise HTTPException(status_code=404, detail="Rendition not found")
+
+    storage = get_storage()
+    if storage.is_local or os.path.exists(upload_path(src)):
+        # Still on this node's disk (local storage, or not offloaded yet)
+        return RedirectResponse(src)
+    return RedirectResponse(storage.url(key_for_src(src)))
+
 
 @router.delete("/snapshots/", response_model=dict)
 def delete_snapshot(id: int = Query(...), db: Session = Depends(get_db)):
@@ -104,17 +260,20 @@ def delete_snapshot(id: int = Query(...), db: Session = Depends(get_db)):
     if not snap:
         raise HTTPException(status_code=404, detail="Snapshot not found")
 
-    if snap.file_src:
-        # ✅ Remove leading slash and convert to absolute path relative to app dir
-        rel_path = snap.file_src.lstrip("/")  # "uploads/snapshots/..."
-        file_path = os.path.join("app", rel_path)
+    storage = get_storage()
+    srcs = [snap.file_src] if snap.file_src else []
+    srcs += rendition_srcs(snap)
+    for src in srcs:
+        file_path = upload_path(src)
 
-        if os.path.exists(file_path):
-            try:
+        try:
+            if os.path.exists(file_path):
                 os.remove(file_path)
                 print(f"🗑️ Deleted file: {file_path}")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"File deletion error: {str(e)}")
+            if not storage.is_local:
+                storage.delete(key_for_src(src))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"File deletion error: {str(e)}")
 
     db.delete(snap)
     db.commit()
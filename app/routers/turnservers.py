@@ -1,12 +1,26 @@
-from fastapi import APIRouter
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+from sqlalchemy.orm import Session
+
+from app.models.all_models import User
+from app.utils.deps import get_current_user, get_db
+from app.utils.ice_servers import ice_servers_for
 
 router = APIRouter()
 
+# Set by the load balancer / CDN in front of the app (e.g. from GeoIP)
+ICE_REGION_HEADER = os.getenv("ICE_REGION_HEADER", "X-Client-Region")
+
+
 @router.get("/turnservers")
-async def get_turn_servers():
-    return {
-        "iceServers": [
-            { "urls": "stun:stun.l.google.com:19302" },
-            { "urls": "turn:your.turn.server:3478", "username": "user", "credential": "pass" }
-        ]
-    }
\ No newline at end of file
+def get_turn_servers(
+    region: Optional[str] = Query(None, description="Preferred region; defaults to the region header"),
+    region_header: Optional[str] = Header(None, alias=ICE_REGION_HEADER),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    # Authenticated: the response carries live TURN relay credentials,
+    # issued per user so coturn logs attribute relayed traffic to them
+    return {"iceServers": ice_servers_for(db, region or region_header, user=str(current_user.id))}
@@ -1,37 +1,52 @@
 # app/routers/users.py
 
 import os
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 
-from app.models.database import SessionLocal
+from app.models.database import SessionLocal, get_async_db
 from app.models.all_models import User
 from app.schemas.all import UserLogin, UserRegister
-from app.utils.security import hash_password, verify_password, create_access_token
-from app.utils.deps import get_db, system_admin_required
+from app.utils.security import hash_password_pooled, verify_password_async, create_access_token
+from app.utils.deps import get_current_user, get_db, system_admin_required
+from app.utils.user_cache import user_cache
 
 router = APIRouter()
 
 
 @router.post("/login")
-def login(payload: UserLogin, db: Session = Depends(get_db)):
+async def login(payload: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Login using login_name + password.
     For hospital admins this will be the generated ID (e.g., APLH001).
     """
 
-    user = db.query(User).filter(User.login_name == payload.login_name).first()
+    result = await db.execute(select(User).where(User.login_name == payload.login_name))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # ✅ Prefer hashed_password
     if user.hashed_password:
-        if not verify_password(payload.password, user.hashed_password):
+        ok, new_hash = await verify_password_async(payload.password, user.hashed_password)
+        if not ok:
             raise HTTPException(status_code=400, detail="Incorrect password")
+
+        # Opportunistic rehash when pwd_context settings have changed
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
+            user_cache.invalidate(user.id)
     else:
         # Optional: for old data where hash was incorrectly stored in show_pwd
-        if not user.show_pwd or not verify_password(payload.password, user.show_pwd):
+        if not user.show_pwd:
+            raise HTTPException(status_code=400, detail="Incorrect password")
+        ok, _ = await verify_password_async(payload.password, user.show_pwd)
+        if not ok:
             raise HTTPException(status_code=400, detail="Incorrect password")
 
     token = create_access_token({"sub": str(user.id)})
@@ -64,7 +79,7 @@ def register_user(payload: UserRegister, db: Session = Depends(get_db)):
         mobile=payload.mobile,
         login_name=payload.login_name,                    # login with mobile
         show_pwd=plain_password,                      # ✅ raw password stored
-        hashed_password=hash_password(plain_password),# ✅ hashed value
+        hashed_password=hash_password_pooled(plain_password),# ✅ hashed value
         is_active=True,
         active=True,                                  # if you want both
         is_hadmin=True,
@@ -82,6 +97,22 @@ def register_user(payload: UserRegister, db: Session = Depends(get_db)):
 
 
 
+@router.post("/logout")
+def logout(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Revoke every token issued to the caller so far by stamping last_logout.
+    """
+    user = db.query(User).filter(User.id == current_user.id).first()
+    user.last_logout = datetime.utcnow()
+    db.commit()
+
+    user_cache.invalidate(user.id)
+    return {"message": "Logged out"}
+
+
 def login_required(user: User = Depends(system_admin_required)) -> User:
     return user
 
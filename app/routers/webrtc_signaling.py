@@ -1,24 +1,143 @@
 # app/routers/webrtc_signaling.py
 
+import os
+import time
+from typing import Dict, List, Tuple
+
 import socketio
-from fastapi import APIRouter
+from dotenv import load_dotenv
+from fastapi import APIRouter, Depends
+from redis.asyncio import Redis
+
+from app.utils.deps import system_admin_required
+from app.utils.presence import BROADCASTER, VIEWER, RoomRegistry
+
+load_dotenv()
+
+# With SIO_REDIS_URL set, emits to a sid or room are published through Redis
+# so peers connected to different processes/hosts still reach each other.
+SIO_REDIS_URL = os.getenv("SIO_REDIS_URL")
+SIO_CHANNEL = os.getenv("SIO_CHANNEL", "medfly-signaling")
 
-sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+# "websocket" only removes the need for sticky sessions (long-polling
+# requests of one client must otherwise all hit the same process).
+SIO_TRANSPORTS = os.getenv("SIO_TRANSPORTS", "polling,websocket").split(",")
+
+client_manager = (
+    socketio.AsyncRedisManager(SIO_REDIS_URL, channel=SIO_CHANNEL)
+    if SIO_REDIS_URL
+    else None
+)
+
+sio = socketio.AsyncServer(
+    async_mode='asgi',
+    cors_allowed_origins='*',
+    client_manager=client_manager,
+    transports=SIO_TRANSPORTS,
+)
 router = APIRouter()
 
+# Presence is mirrored through the same Redis as the client manager, so
+# every process sees every room
+PRESENCE_STALE_SECONDS = int(os.getenv("PRESENCE_STALE_SECONDS", "0"))
+registry = RoomRegistry(
+    redis=Redis.from_url(SIO_REDIS_URL) if SIO_REDIS_URL else None,
+    stale_after=PRESENCE_STALE_SECONDS,
+)
+
+# Trickle ICE produces a burst of tiny candidate messages per peer pair.
+# Candidates bound for a peer that joined with batch_candidates=true are
+# held for CANDIDATE_BATCH_MS and delivered as one "candidates" event;
+# 0 disables the window (arrays are still relayed as arrays).
+CANDIDATE_BATCH_MS = int(os.getenv("CANDIDATE_BATCH_MS", "25"))
+
+# Per-sid token bucket: CANDIDATE_RATE candidates/second sustained, up to
+# CANDIDATE_BURST at once. Anything above that is dropped, not queued.
+CANDIDATE_RATE = float(os.getenv("CANDIDATE_RATE", "50"))
+CANDIDATE_BURST = int(os.getenv("CANDIDATE_BURST", "100"))
+
+_candidate_buckets: Dict[str, List[float]] = {}          # sid -> [tokens, updated_at]
+_pending_candidates: Dict[Tuple[str, str], list] = {}    # (from, to) -> candidates
+
+
+def _take_candidate_tokens(sid: str, wanted: int) -> int:
+    """How many of `wanted` candidates sid may send right now."""
+    now = time.monotonic()
+    tokens, updated = _candidate_buckets.get(sid, (CANDIDATE_BURST, now))
+    tokens = min(CANDIDATE_BURST, tokens + (now - updated) * CANDIDATE_RATE)
+    granted = min(wanted, int(tokens))
+    _candidate_buckets[sid] = [tokens - granted, now]
+    return granted
+
+
+async def _flush_candidates(sid: str, to: str):
+    await sio.sleep(CANDIDATE_BATCH_MS / 1000)
+    candidates = _pending_candidates.pop((sid, to), None)
+    if candidates:
+        await sio.emit("candidates", {"from": sid, "candidates": candidates}, to=to)
+
+
+async def _relay_candidates(sid: str, to: str, candidates: list):
+    granted = _take_candidate_tokens(sid, len(candidates))
+    if granted < len(candidates):
+        print(f"⚠️ Rate limit: dropped {len(candidates) - granted} ICE candidate(s) from {sid}")
+        candidates = candidates[:granted]
+    if not candidates:
+        return
+
+    room = registry.room_of(sid)
+    peer = await registry.member(room, to) if room else None
+    if peer is None or not peer.batch_candidates:
+        # Legacy client: one event per candidate, as before
+        for candidate in candidates:
+            await sio.emit("candidate", {"from": sid, "candidate": candidate}, to=to)
+        return
+
+    if CANDIDATE_BATCH_MS <= 0:
+        await sio.emit("candidates", {"from": sid, "candidates": candidates}, to=to)
+        return
+
+    pending = _pending_candidates.get((sid, to))
+    if pending is not None:
+        # A flush for this pair is already scheduled; ride along with it
+        pending.extend(candidates)
+        return
+    _pending_candidates[(sid, to)] = list(candidates)
+    sio.start_background_task(_flush_candidates, sid, to)
+
+
 @sio.event
 async def connect(sid, environ):
     print(f"🟢 Client connected: {sid}")
 
 @sio.event
 async def disconnect(sid):
+    room = await registry.leave(sid)
+    _candidate_buckets.pop(sid, None)
+    if room:
+        await sio.emit("peer-left", {"sid": sid}, room=room)
     print(f"🔴 Client disconnected: {sid}")
 
 @sio.event
 async def join(sid, data):
     room = data.get("room")
+    role = data.get("role") or (BROADCASTER if data.get("broadcaster") else VIEWER)
     await sio.enter_room(sid, room)
-    print(f"👥 {sid} joined room {room}")
+    await registry.join(sid, room, role, batch_candidates=bool(data.get("batch_candidates")))
+
+    # Hand the newcomer the current roster so it needs no extra round trip
+    members = await registry.members(room)
+    peers = [
+        {"sid": peer, "role": m.role, "joined_at": m.joined_at}
+        for peer, m in members.items()
+        if peer != sid
+    ]
+    await sio.emit("peers", {"room": room, "peers": peers}, to=sid)
+    print(f"👥 {sid} joined room {room} as {role}")
+
+@sio.event
+async def heartbeat(sid, data=None):
+    await registry.touch(sid)
 
 @sio.event
 async def offer(sid, data):
@@ -34,14 +153,31 @@ async def answer(sid, data):
 
 @sio.event
 async def candidate(sid, data):
-    to = data["to"]
-    candidate = data["candidate"]
-    await sio.emit("candidate", {"from": sid, "candidate": candidate}, to=to)
+    await _relay_candidates(sid, data["to"], [data["candidate"]])
+
+@sio.event
+async def candidates(sid, data):
+    # Batched form: {"to": sid, "candidates": [...]}
+    await _relay_candidates(sid, data["to"], list(data.get("candidates") or []))
 
 @sio.event
 async def viewer_ready(sid, data):
     viewer_id = sid  # use sid of the viewer who just connected
     room = data.get("room")
-    # Notify broadcaster(s) in the same room that a viewer is ready
-    await sio.emit("viewer-ready", {"viewer_id": viewer_id}, room=room)
+    await registry.touch(sid)
+
+    # Notify only the room's broadcaster(s); fall back to the whole room
+    # for clients that joined without declaring a role
+    broadcasters = await registry.broadcasters(room)
+    if broadcasters:
+        for broadcaster in broadcasters:
+            await sio.emit("viewer-ready", {"viewer_id": viewer_id}, to=broadcaster)
+    else:
+        await sio.emit("viewer-ready", {"viewer_id": viewer_id}, room=room, skip_sid=sid)
     print(f"👀 Viewer {viewer_id} is ready in room {room}")
+
+
+@router.get("/signaling/rooms")
+async def room_counts(user=Depends(system_admin_required)):
+    """Per-room broadcaster/viewer counts (all processes when Redis-backed)."""
+    return await registry.counts()
@@ -0,0 +1,175 @@
+# app/routers/ws_signaling.py
+
+import asyncio
+import json
+import os
+from typing import Dict, Optional
+from uuid import uuid4
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from redis.asyncio import Redis
+
+from app.utils.presence import BROADCASTER, VIEWER, RoomRegistry
+
+load_dotenv()
+
+# Raw-WebSocket signaling for clients without Socket.IO. Same messages as
+# the old standalone live-streaming app: {"type": "join" | "offer" |
+# "answer" | "candidate" | "heartbeat", ...}.
+
+# With a Redis URL, peers on different processes reach each other through
+# one pub/sub channel and the room roster is mirrored like Socket.IO's.
+WS_REDIS_URL = os.getenv("WS_REDIS_URL") or os.getenv("SIO_REDIS_URL")
+WS_CHANNEL = os.getenv("WS_CHANNEL", "medfly-ws-signaling")
+
+# Messages buffered per peer before it is considered too slow and dropped
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+
+# Mirrored members not refreshed for this long belong to a process that
+# died without cleaning up, and are dropped. Each process re-stamps its
+# own members every third of that, so live peers never go stale.
+WS_PRESENCE_STALE_SECONDS = int(os.getenv("WS_PRESENCE_STALE_SECONDS", "60"))
+
+router = APIRouter()
+
+redis = Redis.from_url(WS_REDIS_URL) if WS_REDIS_URL else None
+registry = RoomRegistry(redis=redis, stale_after=WS_PRESENCE_STALE_SECONDS, prefix="presence:ws")
+
+
+class Peer:
+    """
+    One connected socket and its outbound queue. A dedicated sender task
+    drains the queue, so fan-out only ever does a non-blocking put and a
+    slow viewer cannot hold up delivery to the rest of its room.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.sender = asyncio.create_task(self._send_loop())
+
+    async def _send_loop(self):
+        try:
+            while True:
+                await self.websocket.send_json(await self.queue.get())
+        except Exception:
+            # Connection went away; the receive loop cleans up
+            pass
+
+    def send(self, message: dict) -> bool:
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def close(self, code: int = 1013):
+        # 1013 "try again later": a gap in signaling breaks negotiation, so
+        # a peer that fell behind is made to reconnect rather than skipped
+        self.sender.cancel()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+
+_peers: Dict[str, Peer] = {}
+_listener: Optional[asyncio.Task] = None
+_presence_keeper: Optional[asyncio.Task] = None
+
+
+def _push(peer_id: str, message: dict) -> bool:
+    """Queue a message for a peer on this process; False if it is not here."""
+    peer = _peers.get(peer_id)
+    if peer is None:
+        return False
+    if not peer.send(message):
+        print(f"⚠️ Send queue full for {peer_id}; closing slow peer")
+        _peers.pop(peer_id, None)
+        asyncio.create_task(peer.close())
+    return True
+
+
+async def _deliver(peer_id: str, message: dict):
+    if not _push(peer_id, message) and redis is not None:
+        await redis.publish(WS_CHANNEL, json.dumps({"to": peer_id, "message": message}))
+
+
+async def _listen():
+    pubsub = redis.pubsub()
+    await pubsub.subscribe(WS_CHANNEL)
+    async for item in pubsub.listen():
+        if item["type"] != "message":
+            continue
+        envelope = json.loads(item["data"])
+        _push(envelope["to"], envelope["message"])
+
+
+async def _keep_presence():
+    """Keep this process's members fresh and sweep up after dead processes."""
+    while True:
+        await asyncio.sleep(WS_PRESENCE_STALE_SECONDS / 3)
+        try:
+            await registry.refresh()
+            await registry.prune()
+        except Exception as e:
+            print(f"⚠️ Presence sweep failed: {e}")
+
+
+def _ensure_listener():
+    global _listener, _presence_keeper
+    if redis is None:
+        return
+    if _listener is None or _listener.done():
+        _listener = asyncio.create_task(_listen())
+    if WS_PRESENCE_STALE_SECONDS and (_presence_keeper is None or _presence_keeper.done()):
+        _presence_keeper = asyncio.create_task(_keep_presence())
+
+
+async def _join(peer_id: str, data: dict) -> str:
+    room = data["room"]
+    is_broadcaster = bool(data.get("broadcaster", False))
+    await registry.join(peer_id, room, BROADCASTER if is_broadcaster else VIEWER)
+
+    if not is_broadcaster:
+        # Notify the broadcaster(s) that a viewer is ready; rooms whose
+        # members never declared a role get the old notify-everyone fan-out
+        targets = await registry.broadcasters(room)
+        if not targets:
+            targets = [other for other in await registry.members(room) if other != peer_id]
+        for target in targets:
+            await _deliver(target, {"type": "viewer-ready", "viewer_id": peer_id})
+    return room
+
+
+@router.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    await websocket.accept()
+    _ensure_listener()
+
+    peer_id = uuid4().hex
+    peer = Peer(websocket)
+    _peers[peer_id] = peer
+    room = None
+    try:
+        while True:
+            data = await websocket.receive_json()
+            if data["type"] == "join":
+                room = await _join(peer_id, data)
+            elif data["type"] == "heartbeat":
+                await registry.touch(peer_id)
+            elif data["type"] in ("offer", "answer", "candidate"):
+                # Only relay within the sender's own room
+                if room and await registry.member(room, data["to"]):
+                    await _deliver(data["to"], {**data, "from": peer_id})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        _peers.pop(peer_id, None)
+        peer.sender.cancel()
+        # Leaving drops the room once its last member is gone
+        room = await registry.leave(peer_id)
+        if room:
+            for other in await registry.members(room):
+                await _deliver(other, {"type": "peer-left", "peer_id": peer_id})
@@ -1,5 +1,9 @@
 # app/rq_launcher.py
-import multiprocessing as mp
-mp.set_start_method("forkserver", force=True)  # required for some platforms
+import os
 
-import app.worker as worker  # This uses forkserver safely and runs the worker
+os.environ.setdefault("WORKER_START_METHOD", "forkserver")  # required for some platforms
+
+import app.worker as worker
+
+if __name__ == "__main__":
+    worker.run_worker()
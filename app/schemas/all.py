@@ -74,10 +74,11 @@ class Device(DeviceBase):
 
 
 class DeviceListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     limit: int
     offset: int
     devices: List[Device]
+    next_cursor: Optional[str] = None
 
 
 class DepartmentBase(BaseModel):
@@ -293,10 +294,11 @@ class PatientRegistration(PatientRegistrationBase):
 # -----------------------------------------------------------
 
 class PaginatedResponse(GenericModel, Generic[T]):
-    total: int
+    total: Optional[int] = None   # None when requested with with_total=false
     limit: int
     offset: int
     items: List[T]
+    next_cursor: Optional[str] = None
 
 
 class SnapshotsBase(BaseModel):
@@ -307,6 +309,8 @@ class SnapshotsBase(BaseModel):
     procedure_datetime: str
     file_src: Optional[str] = None
     file_thumbnail: Optional[str] = None
+    content_hash: Optional[str] = None
+    thumbnail_renditions: Optional[str] = None
     file_type: Optional[str] = "snap"
     file_status: Optional[str] = "main"
     annotation_data: Optional[str] = ""
@@ -324,6 +328,24 @@ class Snapshots(SnapshotsBase):
         from_attributes = True
 
 
+class RecordingBase(BaseModel):
+    hospital_id: Optional[int] = None
+    uid: Optional[str] = None
+    visit_id: Optional[int] = None
+    filename: str
+    content_type: Optional[str] = "video/webm"
+    size_bytes: int = 0
+    duration_seconds: Optional[float] = None
+
+
+class Recording(RecordingBase):
+    id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class MenuItemBase(BaseModel):
     hospital_id: int
     user_id: str
@@ -366,6 +388,8 @@ class IceServerBase(BaseModel):
     urls: str
     username: Optional[str] = None
     credential: Optional[str] = None
+    region: Optional[str] = None
+    use_auth_secret: bool = False
 
 
 class IceServerCreate(IceServerBase):
@@ -383,6 +407,7 @@ class IceServerPublic(BaseModel):
     id: int
     urls: str
     username: Optional[str] = None
+    region: Optional[str] = None
 
     class Config:
         from_attributes = True
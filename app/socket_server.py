@@ -3,6 +3,7 @@
 import os
 
 import uvicorn
+from fastapi import FastAPI
 from socketio import ASGIApp
 
 from app.routers import webrtc_signaling
@@ -11,8 +12,12 @@ from app.routers import webrtc_signaling
 # Use the existing Socket.IO server from your webrtc_signaling router
 sio = webrtc_signaling.sio
 
-# ASGI app that serves only Socket.IO
-sio_app = ASGIApp(sio)
+# Small HTTP side-app for signaling admin endpoints (room counts)
+api = FastAPI(title="Medfly Signaling")
+api.include_router(webrtc_signaling.router, prefix="/api", tags=["Signaling"])
+
+# Socket.IO on /socket.io, everything else falls through to the side-app
+sio_app = ASGIApp(sio, other_asgi_app=api)
 
 
 def run_sio():
@@ -21,12 +26,29 @@ def run_sio():
 
     Runs the Socket.IO signaling server on a separate port
     from the FastAPI HTTP API.
+
+    SIO_WORKERS > 1 starts several processes on the same port. That needs
+    SIO_REDIS_URL (so relays cross processes) and either
+    SIO_TRANSPORTS=websocket or a load balancer with sticky sessions in
+    front of separate ports/hosts, since polling clients must keep hitting
+    the process that owns their session. SIO_RELOAD=true is for
+    development only and forces a single worker.
     """
+    workers = int(os.getenv("SIO_WORKERS", "1"))
+    reload = os.getenv("SIO_RELOAD", "false").lower() == "true"
+
+    if workers > 1 and not webrtc_signaling.SIO_REDIS_URL:
+        raise RuntimeError("SIO_WORKERS > 1 requires SIO_REDIS_URL")
+    if workers > 1 and "polling" in webrtc_signaling.SIO_TRANSPORTS:
+        print("[sio] Warning: polling without sticky sessions fails across workers; "
+              "set SIO_TRANSPORTS=websocket")
+
     uvicorn.run(
         "app.socket_server:sio_app",
         host="0.0.0.0",
         port=int(os.getenv("SIO_PORT", "9000")),
-        reload=True,  # nice for development
+        reload=reload,
+        workers=1 if reload else workers,
     )
 
 
@@ -15,10 +15,34 @@ let liveInterval, liveSeconds = 0;
 
 let ICE_CONFIG = { iceServers: [] };
 
+// Outgoing ICE candidates are coalesced per peer and sent as one
+// "candidates" event instead of one "candidate" event each.
+const CANDIDATE_BATCH_MS = 20;
+const pendingCandidates = {};
+
+function queueCandidate(to, candidate) {
+  if (pendingCandidates[to]) {
+    pendingCandidates[to].push(candidate);
+    return;
+  }
+  pendingCandidates[to] = [candidate];
+  setTimeout(() => {
+    const candidates = pendingCandidates[to];
+    delete pendingCandidates[to];
+    socket.emit("candidates", { to, candidates });
+  }, CANDIDATE_BATCH_MS);
+}
+
 
 async function loadIceServers() {
   try {
-    const res = await fetch("/api/turnservers");
+    // TURN credentials are only handed to signed-in users; anyone else
+    // (e.g. a viewer opening a shared room link) gets the STUN fallback.
+    const token = localStorage.getItem("access_token");
+    const res = await fetch("/api/turnservers", {
+      headers: token ? { Authorization: `Bearer ${token}` } : {}
+    });
+    if (!res.ok) throw new Error(`turnservers: ${res.status}`);
     const data = await res.json();
     ICE_CONFIG = { iceServers: data.iceServers };
     console.log("✅ Loaded dynamic ICE config:", ICE_CONFIG);
@@ -137,7 +161,7 @@ function uploadSnapshot(base64Img) {
 /* Document Events */
 document.addEventListener("DOMContentLoaded", () => {
   if (isViewer) {
-    socket.emit("join", { room, broadcaster: false });
+    socket.emit("join", { room, broadcaster: false, batch_candidates: true });
     socket.emit("viewer_ready", { room });  // emit room to server
     document.body.classList.add("viewer-only");
   } else {
@@ -189,7 +213,7 @@ function toggleStream() {
 
         if (!room) room = deviceId + '-' + Math.random().toString(36).substr(2, 5);
 
-        socket.emit("join", { room, broadcaster: true });
+        socket.emit("join", { room, broadcaster: true, batch_candidates: true });
 
         liveSeconds = 0;
         clearInterval(liveInterval);
@@ -367,7 +391,7 @@ socket.on("viewer-ready", ({ viewer_id }) => {
     const pc = new RTCPeerConnection(ICE_CONFIG);
     peerConnections[viewer_id] = pc;
     mediaStream.getTracks().forEach(track => pc.addTrack(track, mediaStream));
-    pc.onicecandidate = e => e.candidate && socket.emit("candidate", { to: viewer_id, candidate: e.candidate });
+    pc.onicecandidate = e => e.candidate && queueCandidate(viewer_id, e.candidate);
     pc.createOffer().then(offer => {
       pc.setLocalDescription(offer);
       socket.emit("offer", { to: viewer_id, offer });
@@ -380,6 +404,11 @@ socket.on("candidate", ({ from, candidate }) => {
   if (pc && candidate) pc.addIceCandidate(new RTCIceCandidate(candidate));
 });
 
+socket.on("candidates", ({ from, candidates }) => {
+  const pc = peerConnections[from];
+  if (pc) candidates.forEach(c => c && pc.addIceCandidate(new RTCIceCandidate(c)));
+});
+
 function toggleFullscreen() {
   const vc = document.querySelector(".video-grid");
   if (!document.fullscreenElement) vc.requestFullscreen();
@@ -0,0 +1,11 @@
+# app/tasks/aws_upload_tasks.py
+from app.tasks.offload_tasks import enqueue_offload, offload_file
+
+
+def upload_to_s3(local_path: str, key: str, delete_local: bool = True):
+    """Offload a local file to AWS_S3_BUCKET_NAME (multipart, parallel parts)."""
+    return offload_file(local_path, key, delete_local, backend="s3")
+
+
+def enqueue_s3_upload(local_path: str, key: str, delete_local: bool = True):
+    return enqueue_offload(local_path, key, delete_local, backend="s3")
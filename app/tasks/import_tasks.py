@@ -0,0 +1,198 @@
+# app/tasks/import_tasks.py
+import csv
+import json
+import os
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from rq import get_current_job
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import all_models as models
+from app.models.database import SessionLocal
+from app.schemas.all import PatientRegistrationCreate
+from app.utils.patients import upsert_patient_visits
+from app.utils.rollups import apply_rollup_deltas
+
+load_dotenv()
+
+# Rows validated, upserted and committed together
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# Per-row errors kept in the job's progress report
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "100"))
+
+PATIENT_FIELDS = ("name", "mobile", "age", "gender")
+
+
+def _read_rows(path: str, fmt: str) -> Iterator[Tuple[int, object]]:
+    """(line number, raw row) pairs from a CSV (with header) or NDJSON file."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            # Header is line 1
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                yield line_no, row
+        else:
+            # Decoded in _parse, so one bad line is reported, not fatal
+            for line_no, line in enumerate(f, start=1):
+                if line.strip():
+                    yield line_no, line
+
+
+def _clean(raw: dict) -> dict:
+    # Blank CSV cells mean "not given", so schema defaults apply
+    return {k.strip(): v for k, v in raw.items() if k and v not in ("", None)}
+
+
+def _parse(raw) -> Tuple[dict, dict]:
+    """Validated registration columns and the patient fields of one row."""
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    if not isinstance(raw, dict):
+        raise ValueError("Each row must be an object")
+    raw = _clean(raw)
+    data = PatientRegistrationCreate(**raw).dict()
+    data["procedure_date"] = data.pop("date")
+    # Historical registers keep their own entry date
+    entry_date = raw.get("entry_date")
+    data["entry_date"] = date.fromisoformat(entry_date) if entry_date else date.today()
+
+    patient = {field: raw.get(field) for field in PATIENT_FIELDS}
+    if patient["age"] is not None:
+        patient["age"] = int(patient["age"])
+    return data, patient
+
+
+def _short_error(e: SQLAlchemyError) -> str:
+    """
+    First line of the driver's message. str(e) also carries the SQL and
+    bound parameters (patient data), which must not end up in job meta.
+    """
+    message = str(getattr(e, "orig", None) or e.__class__.__name__).strip()
+    return message.splitlines()[0][:200] if message else e.__class__.__name__
+
+
+def _import_batch(db, hospital_id: int, batch: List[Tuple[dict, dict]]) -> int:
+    """
+    Upsert the batch's patients, number their visits and insert the
+    registrations, all in the caller's transaction.
+    """
+    patients: Dict[str, dict] = {}
+    for data, patient in batch:
+        entry = patients.setdefault(data["uid"], {"visits": 0, "registered_on": data["procedure_date"]})
+        entry["visits"] += 1
+        entry["alt_id"] = data["alt_id"] if data["alt_id"] not in (None, "--") else entry.get("alt_id")
+        # Later rows win, as they would with one request per row
+        entry.update({k: v for k, v in patient.items() if v not in (None, "")})
+
+    conn = db.connection()
+    totals = upsert_patient_visits(conn, hospital_id, patients)
+
+    # A patient with n rows here and T visits now owns numbers T-n+1..T,
+    # handed out in file order
+    next_visit = {uid: totals[uid] - p["visits"] + 1 for uid, p in patients.items()}
+    rows = []
+    deltas = Counter()
+    doctor_names = {}
+    for data, _ in batch:
+        uid = data["uid"]
+        rows.append({**data, "hospital_id": hospital_id, "visit_id": next_visit[uid]})
+        next_visit[uid] += 1
+        key = (
+            hospital_id, data["entry_date"], data["procedure_name"] or "",
+            data["referrer_name"] or "", data["doctor_id"] or "",
+        )
+        deltas[key] += 1
+        # Spellings may differ per row; the rollup keeps the last one
+        doctor_names[key] = data["doctor_name"] or ""
+
+    conn.execute(models.PatientRegistration.__table__.insert(), rows)
+    # Core inserts bypass the session hook, so feed the rollups directly
+    apply_rollup_deltas(conn, deltas, doctor_names)
+    return len(rows)
+
+
+def import_registrations(path: str, hospital_id: int, fmt: str = "csv", delete_file: bool = True):
+    """
+    Bulk-load a register export into patient_registration / patient_info.
+
+    Rows are validated with PatientRegistrationCreate and committed in
+    batches of IMPORT_BATCH_SIZE; invalid rows are skipped and reported.
+    Progress is published on the job's meta (processed, imported, failed,
+    errors) after every batch.
+
+    `path` is read directly, so it must be on a volume this worker shares
+    with the API process that received the upload (see IMPORT_DIR).
+    """
+    if not os.path.exists(path):
+        # The API spools to IMPORT_DIR on its own disk; a worker on
+        # another host only sees it through a shared volume
+        raise FileNotFoundError(f"{path} not found; IMPORT_DIR must be shared with the worker")
+
+    job = get_current_job()
+    progress = {"processed": 0, "imported": 0, "failed": 0, "errors": []}
+
+    def report(line_no: Optional[int], message: str):
+        progress["failed"] += 1
+        if len(progress["errors"]) < IMPORT_MAX_ERRORS:
+            progress["errors"].append({"line": line_no, "error": message})
+
+    def publish():
+        if job is not None:
+            job.meta.update(progress)
+            job.save_meta()
+
+    def flush(batch, lines):
+        try:
+            progress["imported"] += _import_batch(db, hospital_id, batch)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"[import] hospital {hospital_id}: batch failed: {e!r}")
+            message = f"Batch failed: {_short_error(e)}"
+            for line_no in lines:
+                report(line_no, message)
+        publish()
+
+    db = SessionLocal()
+    try:
+        batch, lines = [], []
+        for line_no, raw in _read_rows(path, fmt):
+            progress["processed"] += 1
+            try:
+                batch.append(_parse(raw))
+                lines.append(line_no)
+            except (ValidationError, ValueError, TypeError) as e:
+                report(line_no, str(e))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush(batch, lines)
+                batch, lines = [], []
+        if batch:
+            flush(batch, lines)
+
+        # New PatientInfo rows came in through core inserts as well
+        hospitals = models.Hospital.__table__
+        db.execute(
+            update(hospitals)
+            .where(hospitals.c.id == hospital_id)
+            .values(
+                total_patients=select(func.count())
+                .where(models.PatientInfo.hospital_id == hospital_id)
+                .scalar_subquery()
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+        if delete_file and os.path.exists(path):
+            os.remove(path)
+
+    publish()
+    print(
+        f"[import] hospital {hospital_id}: {progress['imported']} imported, "
+        f"{progress['failed']} failed of {progress['processed']}"
+    )
+    return progress
@@ -0,0 +1,126 @@
+# app/tasks/offload_tasks.py
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+from rq import Retry
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+
+from app.tasks.queues import dead_letter_queue, redis_conn, upload_queue
+from app.utils.storage import file_sha256, get_storage
+
+load_dotenv()
+
+UPLOAD_MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", "5"))
+UPLOAD_RETRY_BASE_SECONDS = int(os.getenv("UPLOAD_RETRY_BASE_SECONDS", "30"))
+UPLOAD_JOB_TIMEOUT = int(os.getenv("UPLOAD_JOB_TIMEOUT", "3600"))
+
+_ACTIVE_STATUSES = ("queued", "started", "deferred", "scheduled")
+
+
+class UploadVerificationError(Exception):
+    """The stored object does not match the local file after upload."""
+
+
+def _matches(stored: Optional[dict], size: int, digest: str) -> bool:
+    return (
+        stored is not None
+        and stored["size"] == size
+        and stored["metadata"].get("sha256") == digest
+    )
+
+
+def offload_file(
+    local_path: str,
+    key: str,
+    delete_local: bool = True,
+    backend: Optional[str] = None,
+):
+    """
+    Copy a local file to the storage backend under `key`.
+
+    Safe to run more than once: an object already stored with the same size
+    and sha256 is not re-sent. The local copy is deleted only after the
+    stored object's size and checksum have been verified; any failure
+    raises so RQ retries.
+    """
+    storage = get_storage(backend)
+    if storage.is_local:
+        return {"key": key, "skipped": True}
+
+    if not os.path.exists(local_path):
+        # A previous attempt may have finished and cleaned up already
+        if storage.head(key) is not None:
+            print(f"[offload:{storage.name}] {key} already uploaded")
+            return {"key": key, "skipped": True}
+        raise FileNotFoundError(local_path)
+
+    size = os.path.getsize(local_path)
+    digest = file_sha256(local_path)
+
+    if not _matches(storage.head(key), size, digest):
+        storage.put_file(local_path, key, metadata={"sha256": digest})
+        if not _matches(storage.head(key), size, digest):
+            raise UploadVerificationError(f"Stored object {key} does not match {local_path}")
+
+    print(f"[offload:{storage.name}] Uploaded {key} ({size} bytes, sha256 {digest})")
+
+    if delete_local:
+        os.remove(local_path)
+        print(f"[offload:{storage.name}] Deleted local file: {local_path}")
+
+    return {"key": key, "size": size, "sha256": digest}
+
+
+def _backoff_intervals():
+    return [UPLOAD_RETRY_BASE_SECONDS * 2 ** i for i in range(UPLOAD_MAX_RETRIES)]
+
+
+def _dead_letter(job, connection, exc_type, exc_value, traceback):
+    """Park uploads that exhausted their retries on the dead-letter queue."""
+    if job.retries_left:
+        return
+    print(f"[offload] Giving up on {job.id}: {exc_value!r}")
+    dead_letter_queue.enqueue(
+        job.func,
+        *job.args,
+        **job.kwargs,
+        job_id=f"{job.id}:dead",
+        job_timeout=UPLOAD_JOB_TIMEOUT,
+    )
+
+
+def enqueue_offload(
+    local_path: str,
+    key: str,
+    delete_local: bool = True,
+    backend: Optional[str] = None,
+) -> Optional[Job]:
+    """
+    Queue an offload job keyed on the object key, so queueing the same
+    file twice while a job is pending returns the existing job. Nothing
+    is queued when the target backend is local disk.
+    """
+    if get_storage(backend).is_local:
+        return None
+
+    job_id = f"upload:{key}"
+    try:
+        existing = Job.fetch(job_id, connection=redis_conn)
+        if existing.get_status() in _ACTIVE_STATUSES:
+            return existing
+    except NoSuchJobError:
+        pass
+
+    return upload_queue.enqueue(
+        offload_file,
+        local_path,
+        key,
+        delete_local,
+        backend,
+        job_id=job_id,
+        job_timeout=UPLOAD_JOB_TIMEOUT,
+        retry=Retry(max=UPLOAD_MAX_RETRIES, interval=_backoff_intervals()),
+        on_failure=_dead_letter,
+    )
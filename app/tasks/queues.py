@@ -0,0 +1,21 @@
+# app/tasks/queues.py
+import os
+
+from dotenv import load_dotenv
+from redis import Redis
+from rq import Queue
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+# Connections are lazy: importing this module never touches Redis
+redis_conn = Redis.from_url(REDIS_URL)
+
+thumbnail_queue = Queue("thumbnails", connection=redis_conn)
+upload_queue = Queue("uploads", connection=redis_conn)
+report_queue = Queue("reports", connection=redis_conn)
+
+# No worker listens here by default. Jobs that exhausted their retries wait
+# for an operator to fix the cause and drain it (rq worker uploads-dead).
+dead_letter_queue = Queue("uploads-dead", connection=redis_conn)
@@ -0,0 +1,60 @@
+# app/tasks/rollup_tasks.py
+import os
+from datetime import date
+from typing import Optional
+
+from dotenv import load_dotenv
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+
+from app.models.database import SessionLocal
+from app.tasks.queues import redis_conn, report_queue
+from app.utils.rollups import rebuild_rollups
+
+load_dotenv()
+
+ROLLUP_JOB_TIMEOUT = int(os.getenv("ROLLUP_JOB_TIMEOUT", "1800"))
+
+_ACTIVE_STATUSES = ("queued", "started", "deferred", "scheduled")
+
+
+def rebuild_rollups_job(
+    hospital_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+):
+    """
+    Recompute daily rollups from raw registrations. Run after bulk writes
+    that bypass the ORM session, or periodically as a consistency repair.
+    """
+    db = SessionLocal()
+    try:
+        written = rebuild_rollups(db, hospital_id, from_date, to_date)
+    finally:
+        db.close()
+    print(f"[rollups] Rebuilt {written} rows (hospital={hospital_id}, {from_date}..{to_date})")
+    return {"rows": written}
+
+
+def enqueue_rollup_rebuild(
+    hospital_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+) -> Job:
+    """Queue a rebuild; an identical one still pending is returned instead."""
+    job_id = f"rollups:{hospital_id or 'all'}:{from_date or ''}:{to_date or ''}"
+    try:
+        existing = Job.fetch(job_id, connection=redis_conn)
+        if existing.get_status() in _ACTIVE_STATUSES:
+            return existing
+    except NoSuchJobError:
+        pass
+
+    return report_queue.enqueue(
+        rebuild_rollups_job,
+        hospital_id,
+        from_date,
+        to_date,
+        job_id=job_id,
+        job_timeout=ROLLUP_JOB_TIMEOUT,
+    )
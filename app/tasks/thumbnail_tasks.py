@@ -0,0 +1,83 @@
+# app/tasks/thumbnail_tasks.py
+import json
+import os
+
+from dotenv import load_dotenv
+from PIL import Image, ImageOps
+
+from app.models.database import SessionLocal
+from app.models import all_models as models
+from app.tasks.offload_tasks import enqueue_offload
+from app.utils.storage import key_for_src
+
+load_dotenv()
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "app/uploads")
+
+# Longest edge, in pixels, of each rendition. The first one becomes
+# Snapshots.file_thumbnail, the gallery tile.
+THUMBNAIL_SIZES = [int(s) for s in os.getenv("THUMBNAIL_SIZES", "320,960").split(",")]
+THUMBNAIL_FORMAT = os.getenv("THUMBNAIL_FORMAT", "webp").lower()  # webp | jpeg
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+
+_EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+
+def upload_path(file_src: str) -> str:
+    """Disk path for a public /uploads/... URL."""
+    return os.path.join(UPLOAD_DIR, key_for_src(file_src))
+
+
+def rendition_srcs(snapshot: models.Snapshots) -> list:
+    """Public URLs of every stored rendition of a snapshot."""
+    if not snapshot.thumbnail_renditions:
+        return []
+    return list(json.loads(snapshot.thumbnail_renditions).values())
+
+
+def generate_snapshot_thumbnails(snapshot_id: int):
+    """
+    Downscale a saved snapshot into THUMBNAIL_SIZES renditions under
+    /uploads/snapshots/thumbs and record them on the row.
+    """
+    db = SessionLocal()
+    try:
+        snapshot = db.query(models.Snapshots).filter_by(id=snapshot_id).first()
+        if snapshot is None or not snapshot.file_src:
+            print(f"[thumbnails] Snapshot {snapshot_id} not found, skipping")
+            return
+
+        source = upload_path(snapshot.file_src)
+        ext = _EXTENSIONS[THUMBNAIL_FORMAT]
+        thumbs_dir = os.path.join(UPLOAD_DIR, "snapshots", "thumbs")
+        os.makedirs(thumbs_dir, exist_ok=True)
+
+        renditions = {}
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img)
+            if THUMBNAIL_FORMAT == "jpeg" and img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+
+            for size in THUMBNAIL_SIZES:
+                thumb = img.copy()
+                thumb.thumbnail((size, size), Image.Resampling.LANCZOS)
+                # Keyed by row id: uploads reuse client filenames, so a
+                # name-based key would let one snapshot overwrite another's
+                name = f"{snapshot.id}_{size}.{ext}"
+                thumb.save(
+                    os.path.join(thumbs_dir, name),
+                    format=THUMBNAIL_FORMAT.upper(),
+                    quality=THUMBNAIL_QUALITY,
+                )
+                renditions[str(size)] = f"/uploads/snapshots/thumbs/{name}"
+
+        snapshot.thumbnail_renditions = json.dumps(renditions)
+        snapshot.file_thumbnail = renditions[str(THUMBNAIL_SIZES[0])]
+        db.commit()
+        print(f"[thumbnails] Snapshot {snapshot_id}: {len(renditions)} renditions")
+
+        # Renditions need the original on disk, so offload only once done
+        for src in [snapshot.file_src, *renditions.values()]:
+            enqueue_offload(upload_path(src), key_for_src(src))
+    finally:
+        db.close()
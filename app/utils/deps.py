@@ -1,26 +1,25 @@
 # app/utils/deps.py
 
 import os
-from fastapi import Depends, HTTPException
+from datetime import timezone
+from fastapi import Depends, HTTPException, Query
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 
-from app.models.database import SessionLocal
+# Re-exported so routers importing get_db from here share the request's
+# session with get_current_user (FastAPI caches a dependency per request).
+from app.models.database import get_db
 from app.models.all_models import User
+from app.utils.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> User:
     credentials_exception = HTTPException(status_code=401, detail="Invalid token")
 
     try:
@@ -35,14 +34,21 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     except JWTError:
         raise credentials_exception
 
-    db = SessionLocal()
-    try:
+    user = user_cache.get(int(user_id))
+    if user is None:
         user = db.query(User).filter(User.id == int(user_id)).first()
-    finally:
-        db.close()
+        if user is None:
+            raise credentials_exception
+        user_cache.set(user)
 
-    if user is None:
-        raise credentials_exception
+    # Tokens issued before the user's last logout are revoked. iat is in
+    # whole seconds, so compare at that resolution: a login in the same
+    # second as the logout must not be rejected for its whole lifetime.
+    issued_at = payload.get("iat")
+    if user.last_logout and issued_at is not None:
+        logout_ts = int(user.last_logout.replace(tzinfo=timezone.utc).timestamp())
+        if issued_at < logout_ts:
+            raise credentials_exception
 
     return user
 
@@ -61,3 +67,13 @@ def hospital_or_system_admin_required(user: User = Depends(get_current_user)) ->
             detail="Hospital or system admin access only",
         )
     return user
+
+
+def hospital_scope_required(
+    hospid: int = Query(...),
+    user: User = Depends(hospital_or_system_admin_required),
+) -> User:
+    """For endpoints taking ?hospid=: hospital admins only see their own hospital."""
+    if not user.is_sadmin and str(hospid) != str(user.hspId):
+        raise HTTPException(status_code=403, detail="Not allowed for this hospital")
+    return user
@@ -0,0 +1,55 @@
+# app/utils/export.py
+
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterable, Iterable, Sequence
+
+from openpyxl import Workbook
+
+# Rows per server-side cursor fetch and per yielded CSV chunk
+EXPORT_CHUNK_SIZE = 2000
+
+CSV_MEDIA_TYPE = "text/csv"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def export_filename(prefix: str, extension: str) -> str:
+    return f"{prefix}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+
+def attachment(filename: str) -> dict:
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+def _csv_chunk(rows: Iterable[Sequence]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def csv_stream(header: Sequence[str], partitions: Iterable[Sequence[Sequence]]):
+    """CSV text, one chunk per cursor partition, so memory stays flat."""
+    yield _csv_chunk([header])
+    for rows in partitions:
+        yield _csv_chunk(rows)
+
+
+async def csv_stream_async(header: Sequence[str], partitions: AsyncIterable[Sequence[Sequence]]):
+    yield _csv_chunk([header])
+    async for rows in partitions:
+        yield _csv_chunk(rows)
+
+
+def write_xlsx(path: str, header: Sequence[str], partitions: Iterable[Sequence[Sequence]], title: str) -> None:
+    """
+    Write rows to an .xlsx file. openpyxl's write-only mode streams each
+    row to disk instead of building the sheet in memory.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    sheet.append(list(header))
+    for rows in partitions:
+        for row in rows:
+            sheet.append(list(row))
+    workbook.save(path)
@@ -0,0 +1,112 @@
+# app/utils/ice_servers.py
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.all_models import IceServer
+
+ICE_SERVER_CACHE_TTL = int(os.getenv("ICE_SERVER_CACHE_TTL", "60"))
+
+# Must equal static-auth-secret in turnserver.conf (coturn use-auth-secret)
+TURN_SHARED_SECRET = os.getenv("TURN_SHARED_SECRET")
+TURN_CREDENTIAL_TTL = int(os.getenv("TURN_CREDENTIAL_TTL", "3600"))
+
+# Served when the ice_servers table is empty so calls can still connect
+# on the LAN / through NAT without relaying.
+DEFAULT_ICE_SERVERS = [{"urls": ["stun:stun.l.google.com:19302"]}]
+
+
+class IceServerCache:
+    """
+    The ice_servers table, held in process memory for ttl seconds.
+
+    Rows change only when an operator adds or moves a TURN box, while every
+    page load asks for them, so a short TTL is all the invalidation needed;
+    invalidate() forces the next lookup to hit the database.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._rows: Optional[List[dict]] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def rows(self, db: Session) -> List[dict]:
+        with self._lock:
+            if self._rows is not None and self._expires_at > time.monotonic():
+                return self._rows
+
+        rows = [
+            {
+                "urls": [url.strip() for url in server.urls.split(",") if url.strip()],
+                "username": server.username,
+                "credential": server.credential,
+                "region": server.region,
+                "use_auth_secret": server.use_auth_secret,
+            }
+            for server in db.query(IceServer).order_by(IceServer.id)
+        ]
+        with self._lock:
+            self._rows = rows
+            self._expires_at = time.monotonic() + self.ttl
+        return rows
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._rows = None
+
+
+ice_server_cache = IceServerCache(ICE_SERVER_CACHE_TTL)
+
+
+def turn_rest_credentials(user: str, ttl: int = TURN_CREDENTIAL_TTL):
+    """
+    Time-limited TURN credentials (TURN REST API / coturn use-auth-secret):
+    username is "<expiry unix time>:<user>", the password its HMAC-SHA1
+    under the shared secret, so coturn can verify them without a lookup.
+    """
+    username = f"{int(time.time()) + ttl}:{user}"
+    digest = hmac.new(TURN_SHARED_SECRET.encode(), username.encode(), hashlib.sha1).digest()
+    return username, base64.b64encode(digest).decode()
+
+
+def nearest_rows(rows: List[dict], region: Optional[str]) -> List[dict]:
+    """
+    Servers for the client's region plus the region-less (global) ones.
+    Without a region, or when no server is in it, every server is returned.
+    """
+    if not region:
+        return rows
+    region = region.lower()
+    regional = [row for row in rows if (row["region"] or "").lower() == region]
+    if not regional:
+        return rows
+    return regional + [row for row in rows if not row["region"]]
+
+
+def ice_servers_for(db: Session, region: Optional[str] = None, user: str = "medfly") -> List[dict]:
+    """RTCPeerConnection iceServers entries for a client in `region`."""
+    rows = nearest_rows(ice_server_cache.rows(db), region)
+    if not rows:
+        return DEFAULT_ICE_SERVERS
+
+    servers = []
+    for row in rows:
+        server = {"urls": row["urls"]}
+        if row["use_auth_secret"]:
+            if not TURN_SHARED_SECRET:
+                print(f"⚠️ TURN_SHARED_SECRET not set; skipping {row['urls']}")
+                continue
+            server["username"], server["credential"] = turn_rest_credentials(user)
+        elif row["username"]:
+            server["username"] = row["username"]
+            server["credential"] = row["credential"]
+        servers.append(server)
+    return servers
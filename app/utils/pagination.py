@@ -0,0 +1,182 @@
+# app/utils/pagination.py
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Select, and_, func, literal, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Pack the sort-key values of the last row into an opaque token."""
+    raw = json.dumps(jsonable_encoder(list(values)), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> list:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def cursor_param(column, value):
+    """
+    A decoded cursor value as a parameter typed like its column. JSON
+    brings dates back as ISO strings; PostgreSQL via psycopg2 casts those
+    implicitly, but asyncpg rejects a str bound to a date column.
+    """
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        python_type = None
+    if python_type in (date, datetime) and isinstance(value, str):
+        try:
+            value = python_type.fromisoformat(value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return literal(value, type_=column.type)
+
+
+def _after(columns: Sequence, values: Sequence, descending: bool):
+    if descending:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
+
+
+def _seek(
+    query,
+    columns: Sequence,
+    limit: int,
+    cursor: Optional[str],
+    offset: int,
+    descending: bool,
+    nullable_lead: bool = False,
+):
+    """
+    Apply ordering, the keyset predicate (or OFFSET when there is no cursor)
+    and a limit+1 probe. Works on both ORM Query and 2.0 select().
+
+    nullable_lead marks the leading column as nullable. Its NULLs rank
+    above every value, as in a PostgreSQL btree (first when descending,
+    last when ascending), so an index on the columns still yields the
+    order. A plain row comparison is unknown against NULL and would end
+    the listing at the first undated row, so the seek handles the NULL
+    group explicitly.
+    """
+    if cursor:
+        raw = decode_cursor(cursor, len(columns))
+        values = [None if v is None else cursor_param(c, v) for c, v in zip(columns, raw)]
+        lead = columns[0]
+        if not nullable_lead:
+            query = query.filter(_after(columns, values, descending))
+        elif raw[0] is None:
+            # Inside the NULL group: the rest of it, then (descending) every value
+            within_nulls = and_(lead.is_(None), _after(columns[1:], values[1:], descending))
+            query = query.filter(or_(within_nulls, lead.isnot(None)) if descending else within_nulls)
+        elif descending:
+            query = query.filter(_after(columns, values, descending))
+        else:
+            query = query.filter(or_(_after(columns, values, descending), lead.is_(None)))
+
+    ordering = [c.desc() if descending else c.asc() for c in columns]
+    if nullable_lead:
+        ordering[0] = ordering[0].nulls_first() if descending else ordering[0].nulls_last()
+    query = query.order_by(*ordering)
+    if offset and not cursor:
+        query = query.offset(offset)
+    return query.limit(limit + 1)
+
+
+def _trim(rows: List, limit: int, key: Callable[[object], Sequence]) -> Tuple[List, Optional[str]]:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(key(rows[-1]))
+    return rows, next_cursor
+
+
+def keyset_page(
+    query: Query,
+    columns: Sequence,
+    key: Callable[[object], Sequence],
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    descending: bool = True,
+    nullable_lead: bool = False,
+) -> Tuple[List, Optional[str]]:
+    """
+    Fetch one page ordered by `columns`, seeking past `cursor` instead of
+    using OFFSET, so every page costs the same regardless of depth.
+    `offset` is only honoured when no cursor is given.
+
+    `key` extracts the values of `columns` from a result row. Returns the
+    rows and the cursor for the next page (None on the last page).
+    """
+    rows = _seek(query, columns, limit, cursor, offset, descending, nullable_lead).all()
+    return _trim(rows, limit, key)
+
+
+def paginate(
+    query: Query,
+    columns: Sequence,
+    key: Callable[[object], Sequence],
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    with_total: bool = True,
+    descending: bool = True,
+    nullable_lead: bool = False,
+) -> dict:
+    """
+    keyset_page plus an optional total. Counting costs a second scan over
+    the filtered rows, so callers that only page forward can pass
+    with_total=False and get total=None.
+    """
+    total = query.order_by(None).count() if with_total else None
+    rows, next_cursor = keyset_page(
+        query, columns, key, limit,
+        cursor=cursor, offset=offset, descending=descending, nullable_lead=nullable_lead,
+    )
+    return {"total": total, "items": rows, "next_cursor": next_cursor}
+
+
+async def paginate_async(
+    db: AsyncSession,
+    stmt: Select,
+    columns: Sequence,
+    key: Callable[[object], Sequence],
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    with_total: bool = True,
+    descending: bool = True,
+) -> dict:
+    """
+    paginate() for AsyncSession and select(). A statement selecting a
+    single entity yields ORM objects, otherwise result rows.
+    """
+    total = None
+    if with_total:
+        count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+        total = (await db.execute(count_stmt)).scalar_one()
+
+    result = await db.execute(_seek(stmt, columns, limit, cursor, offset, descending))
+    if len(stmt.column_descriptions) == 1:
+        rows = list(result.scalars().all())
+    else:
+        rows = list(result.all())
+
+    rows, next_cursor = _trim(rows, limit, key)
+    return {"total": total, "items": rows, "next_cursor": next_cursor}
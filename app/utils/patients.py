@@ -0,0 +1,96 @@
+# app/utils/patients.py
+
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.models.all_models import PatientInfo, PatientRegistration
+from app.models.database import dialect_insert
+
+
+def patient_info_join():
+    """
+    Join condition pairing a registration with its PatientInfo master row.
+    uid is only unique per hospital, so both columns must match.
+    """
+    return and_(
+        PatientInfo.hospital_id == PatientRegistration.hospital_id,
+        PatientInfo.uid == PatientRegistration.uid,
+    )
+
+
+def resolve_patient_info(
+    db: Session, registrations: Iterable[PatientRegistration]
+) -> Dict[Tuple[int, str], PatientInfo]:
+    """
+    Load the PatientInfo rows for a page of registrations in one query.
+
+    Returns a dict keyed on (hospital_id, uid).
+    """
+    uids_by_hospital = defaultdict(set)
+    for reg in registrations:
+        uids_by_hospital[reg.hospital_id].add(reg.uid)
+
+    if not uids_by_hospital:
+        return {}
+
+    conditions = [
+        and_(PatientInfo.hospital_id == hospital_id, PatientInfo.uid.in_(uids))
+        for hospital_id, uids in uids_by_hospital.items()
+    ]
+    rows = db.query(PatientInfo).filter(or_(*conditions)).all()
+
+    return {(p.hospital_id, p.uid): p for p in rows}
+
+
+def upsert_patient_visits(conn, hospital_id: int, patients: Dict[str, dict]) -> Dict[str, int]:
+    """
+    Create or update the PatientInfo rows of one hospital and add new
+    visits to their total_visits, in one INSERT ... ON CONFLICT
+    (hospital_id, uid) ... RETURNING statement.
+
+    `patients` maps uid -> {"visits": n, "name", "mobile", "age", "gender",
+    "alt_id", "registered_on"}. Blank fields leave stored values alone.
+    Returns uid -> total_visits after the increment; the increment happens
+    under the row lock, so concurrent writers never get the same numbers.
+    """
+    if not patients:
+        return {}
+
+    table = PatientInfo.__table__
+    rows = [
+        {
+            "hospital_id": hospital_id,
+            "uid": uid,
+            "alt_id": p.get("alt_id") or "--",
+            "name": p.get("name") or "",
+            "mobile": p.get("mobile") or "",
+            "age": p.get("age"),
+            "gender": p.get("gender") or "",
+            "registered_on": p.get("registered_on"),
+            "total_visits": p["visits"],
+        }
+        # Rows are locked in VALUES order; a fixed (uid) order keeps two
+        # writers touching the same patients from locking them crosswise
+        # and deadlocking
+        for uid, p in sorted(patients.items())
+    ]
+    stmt = dialect_insert(conn)(table).values(rows)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["hospital_id", "uid"],
+        set_={
+            "name": func.coalesce(func.nullif(excluded.name, ""), table.c.name),
+            "mobile": func.coalesce(func.nullif(excluded.mobile, ""), table.c.mobile),
+            "gender": func.coalesce(func.nullif(excluded.gender, ""), table.c.gender),
+            "age": func.coalesce(excluded.age, table.c.age),
+            "alt_id": func.coalesce(func.nullif(excluded.alt_id, "--"), table.c.alt_id),
+            # Set once: keep the first registration date
+            "registered_on": func.coalesce(func.nullif(table.c.registered_on, ""), excluded.registered_on),
+            "total_visits": func.coalesce(table.c.total_visits, 0) + excluded.total_visits,
+        },
+    ).returning(table.c.uid, table.c.total_visits)
+
+    return {uid: total for uid, total in conn.execute(stmt)}
@@ -0,0 +1,181 @@
+# app/utils/presence.py
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from redis.asyncio import Redis
+
+BROADCASTER = "broadcaster"
+VIEWER = "viewer"
+
+# Drop members, and the room from the rooms set once its hash is empty.
+# One script, so a concurrent join elsewhere (HSET, then SADD) can never
+# be left out of the set by a stale emptiness check.
+_DROP_SCRIPT = """
+if #ARGV > 1 then
+    redis.call('HDEL', KEYS[1], unpack(ARGV, 2))
+end
+if redis.call('HLEN', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[2], ARGV[1])
+end
+"""
+
+
+@dataclass(slots=True)
+class Member:
+    role: str
+    joined_at: float
+    last_seen: float
+    batch_candidates: bool = False  # accepts coalesced "candidates" arrays
+
+
+class RoomRegistry:
+    """
+    Who is in which signaling room, and in what role.
+
+    The authoritative copy is an in-memory dict of this process's sids.
+    With a Redis client, every change is mirrored into one hash per room
+    (presence:room:<room>, field = sid) so lookups and counts cover peers
+    connected to other processes too.
+
+    stale_after > 0 drops mirrored members whose last_seen is older than
+    that many seconds, which cleans up after a process that died without
+    running its disconnect handlers. Live processes keep their members
+    fresh with touch() (client heartbeats) or refresh() (a timer).
+
+    prefix namespaces the Redis keys so separate transports sharing one
+    Redis keep separate rosters.
+    """
+
+    def __init__(self, redis: Optional[Redis] = None, stale_after: int = 0, prefix: str = "presence"):
+        self._rooms: Dict[str, Dict[str, Member]] = {}
+        self._sid_room: Dict[str, str] = {}
+        self._redis = redis
+        self.stale_after = stale_after
+        self.prefix = prefix
+
+    def _key(self, room: str) -> str:
+        return f"{self.prefix}:room:{room}"
+
+    @staticmethod
+    def _encode(member: Member) -> str:
+        return json.dumps([member.role, member.joined_at, member.last_seen, member.batch_candidates])
+
+    async def _drop(self, room: str, *sids: str) -> None:
+        await self._redis.eval(_DROP_SCRIPT, 2, self._key(room), f"{self.prefix}:rooms", room, *sids)
+
+    async def _mirror(self, room: str, sid: str, member: Optional[Member]) -> None:
+        if self._redis is None:
+            return
+        if member is None:
+            await self._drop(room, sid)
+        else:
+            await self._redis.hset(self._key(room), sid, self._encode(member))
+            await self._redis.sadd(f"{self.prefix}:rooms", room)
+
+    async def join(self, sid: str, room: str, role: str, batch_candidates: bool = False) -> Member:
+        # A sid is in one room at a time; re-joining moves it
+        await self.leave(sid)
+        now = time.time()
+        member = Member(role=role, joined_at=now, last_seen=now, batch_candidates=batch_candidates)
+        self._rooms.setdefault(room, {})[sid] = member
+        self._sid_room[sid] = room
+        await self._mirror(room, sid, member)
+        return member
+
+    async def leave(self, sid: str) -> Optional[str]:
+        """Remove a sid; returns the room it was in. Empty rooms are dropped."""
+        room = self._sid_room.pop(sid, None)
+        if room is None:
+            return None
+        members = self._rooms.get(room, {})
+        members.pop(sid, None)
+        if not members:
+            self._rooms.pop(room, None)
+        await self._mirror(room, sid, None)
+        return room
+
+    async def touch(self, sid: str) -> None:
+        room = self._sid_room.get(sid)
+        if room is None:
+            return
+        member = self._rooms[room][sid]
+        member.last_seen = time.time()
+        await self._mirror(room, sid, member)
+
+    async def refresh(self) -> None:
+        """Re-stamp last_seen on every member held by this process."""
+        if self._redis is None or not self._rooms:
+            return
+        now = time.time()
+        pipe = self._redis.pipeline(transaction=False)
+        for room, members in self._rooms.items():
+            for sid, member in members.items():
+                member.last_seen = now
+                pipe.hset(self._key(room), sid, self._encode(member))
+        await pipe.execute()
+
+    def room_of(self, sid: str) -> Optional[str]:
+        return self._sid_room.get(sid)
+
+    async def member(self, room: str, sid: str) -> Optional[Member]:
+        """One member of a room, local or (when mirrored) on another process."""
+        member = self._rooms.get(room, {}).get(sid)
+        if member is not None or self._redis is None:
+            return member
+        value = await self._redis.hget(self._key(room), sid)
+        return Member(*json.loads(value)) if value else None
+
+    async def members(self, room: str) -> Dict[str, Member]:
+        if self._redis is None:
+            return dict(self._rooms.get(room, {}))
+
+        raw = await self._redis.hgetall(self._key(room))
+        members, stale = {}, []
+        cutoff = time.time() - self.stale_after
+        for sid, value in raw.items():
+            sid = sid.decode() if isinstance(sid, bytes) else sid
+            member = Member(*json.loads(value))
+            if self.stale_after and member.last_seen < cutoff and sid not in self._sid_room:
+                stale.append(sid)
+                continue
+            members[sid] = member
+        if stale:
+            await self._drop(room, *stale)
+        return members
+
+    async def broadcasters(self, room: str) -> List[str]:
+        members = await self.members(room)
+        return [sid for sid, m in members.items() if m.role == BROADCASTER]
+
+    async def rooms(self) -> List[str]:
+        if self._redis is None:
+            return list(self._rooms)
+        names = await self._redis.smembers(f"{self.prefix}:rooms")
+        return [n.decode() if isinstance(n, bytes) else n for n in names]
+
+    async def counts(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-room broadcaster/viewer counts, for capacity planning. Reading
+        every room also prunes stale members and forgets empty rooms.
+        """
+        result = {}
+        for room in await self.rooms():
+            members = await self.members(room)
+            if not members:
+                if self._redis is not None:
+                    await self._drop(room)
+                continue
+            broadcasters = sum(1 for m in members.values() if m.role == BROADCASTER)
+            result[room] = {
+                "broadcasters": broadcasters,
+                "viewers": len(members) - broadcasters,
+                "total": len(members),
+            }
+        return result
+
+    async def prune(self) -> None:
+        """Drop stale mirrored members and empty rooms from Redis."""
+        await self.counts()
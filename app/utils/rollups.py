@@ -0,0 +1,291 @@
+# app/utils/rollups.py
+
+from collections import Counter
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, event, extract, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.models.database import dialect_insert
+from app.models.all_models import Device, Hospital, PatientInfo, PatientRegistration, RegistrationDailyRollup
+
+Rollup = RegistrationDailyRollup
+
+# Report dimension -> rollup column
+GROUP_COLUMNS = {
+    "procedure": Rollup.procedure_name,
+    "referrer": Rollup.referrer_name,
+    "doctor": Rollup.doctor_name,
+}
+
+_KEY = ("hospital_id", "day", "procedure_name", "referrer_name", "doctor_id")
+
+
+# ------------------------------------------------------------------
+# Incremental maintenance
+# ------------------------------------------------------------------
+
+def _value(obj, name: str, old: bool):
+    """Current attribute value, or the value before this flush when old=True."""
+    if old:
+        history = inspect(obj).attrs[name].history
+        if history.deleted:
+            return history.deleted[0]
+    return getattr(obj, name)
+
+
+def _rollup_key(reg: PatientRegistration, old: bool = False):
+    """The registration's rollup row, as its uq_registration_daily_rollup key."""
+    hospital_id = _value(reg, "hospital_id", old)
+    day = _value(reg, "entry_date", old)
+    if hospital_id is None or day is None:
+        return None
+    return (
+        hospital_id,
+        day,
+        _value(reg, "procedure_name", old) or "",
+        _value(reg, "referrer_name", old) or "",
+        _value(reg, "doctor_id", old) or "",
+    )
+
+
+def apply_rollup_deltas(conn, deltas: Counter, doctor_names: Optional[Dict] = None) -> None:
+    """
+    Add each +/- count to its rollup row in one upsert. Concurrent writers
+    serialize on the row, so counts stay exact without a read first.
+
+    deltas is keyed on the five unique-key columns, so each rollup row
+    appears once per statement. doctor_names maps a key to the doctor's
+    current name (last wins); keys without one keep the stored name.
+    """
+    doctor_names = doctor_names or {}
+    # Sorted so concurrent writers lock shared rollup rows in one order
+    keys = sorted(
+        [key for key, count in deltas.items() if count]
+        + [key for key in doctor_names if not deltas.get(key)]
+    )
+    rows = [
+        {
+            **dict(zip(_KEY, key)),
+            "doctor_name": doctor_names.get(key, ""),
+            "registrations": deltas.get(key, 0),
+        }
+        for key in keys
+    ]
+    if not rows:
+        return
+    stmt = dialect_insert(conn)(Rollup.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(_KEY),
+        set_={
+            "registrations": Rollup.__table__.c.registrations + stmt.excluded.registrations,
+            "doctor_name": func.coalesce(
+                func.nullif(stmt.excluded.doctor_name, ""), Rollup.__table__.c.doctor_name
+            ),
+        },
+    )
+    conn.execute(stmt)
+
+
+def adjust_hospital_counter(conn, hospital_id: int, column: str, delta: int) -> None:
+    """Atomically add delta to Hospital.total_patients / total_devices."""
+    if not delta:
+        return
+    hospitals = Hospital.__table__
+    conn.execute(
+        update(hospitals)
+        .where(hospitals.c.id == hospital_id)
+        .values({column: func.coalesce(hospitals.c[column], 0) + delta})
+    )
+
+
+def _hospital_counter_deltas(session: Session, model) -> Counter:
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, model) and obj.hospital_id is not None:
+            deltas[obj.hospital_id] += 1
+    for obj in session.deleted:
+        if isinstance(obj, model):
+            hospital_id = _value(obj, "hospital_id", old=True)
+            if hospital_id is not None:
+                deltas[hospital_id] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, model) and inspect(obj).attrs.hospital_id.history.has_changes():
+            old, new = _value(obj, "hospital_id", old=True), obj.hospital_id
+            if old is not None:
+                deltas[old] -= 1
+            if new is not None:
+                deltas[new] += 1
+    return deltas
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_rollups(session: Session, flush_context) -> None:
+    """
+    Fold every PatientRegistration insert/update/delete of this flush into
+    the daily rollups, and keep Hospital.total_patients / total_devices in
+    step with PatientInfo / Device rows, inside the same transaction.
+
+    Bulk statements (query.delete(), core INSERTs) bypass the session;
+    their writers must call rebuild_rollups for the affected range.
+    """
+    deltas = Counter()
+    doctor_names = {}
+    for obj in session.new:
+        if isinstance(obj, PatientRegistration):
+            key = _rollup_key(obj)
+            if key:
+                deltas[key] += 1
+                doctor_names[key] = obj.doctor_name or ""
+    for obj in session.deleted:
+        if isinstance(obj, PatientRegistration):
+            key = _rollup_key(obj, old=True)
+            if key:
+                deltas[key] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, PatientRegistration) and session.is_modified(obj):
+            old, new = _rollup_key(obj, old=True), _rollup_key(obj)
+            if old != new:
+                if old:
+                    deltas[old] -= 1
+                if new:
+                    deltas[new] += 1
+            if new and inspect(obj).attrs.doctor_name.history.has_changes():
+                # A renamed doctor only refreshes the row's display name
+                doctor_names[new] = obj.doctor_name or ""
+
+    counters = {
+        "total_patients": _hospital_counter_deltas(session, PatientInfo),
+        "total_devices": _hospital_counter_deltas(session, Device),
+    }
+    if not deltas and not doctor_names and not any(counters.values()):
+        return
+
+    conn = session.connection()
+    apply_rollup_deltas(conn, deltas, doctor_names)
+    for column, by_hospital in counters.items():
+        for hospital_id, delta in by_hospital.items():
+            adjust_hospital_counter(conn, hospital_id, column, delta)
+
+
+# ------------------------------------------------------------------
+# Full / ranged rebuild
+# ------------------------------------------------------------------
+
+def rebuild_rollups(
+    db: Session,
+    hospital_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+) -> int:
+    """
+    Recompute rollups (and the hospital counters) from raw rows for the
+    given scope, replacing what is there. Returns the rollup rows written.
+    """
+    reg = PatientRegistration
+    scope = [Rollup.hospital_id.isnot(None)]
+    source = [reg.hospital_id.isnot(None), reg.entry_date.isnot(None)]
+    if hospital_id is not None:
+        scope.append(Rollup.hospital_id == hospital_id)
+        source.append(reg.hospital_id == hospital_id)
+    if from_date is not None:
+        scope.append(Rollup.day >= from_date)
+        source.append(reg.entry_date >= from_date)
+    if to_date is not None:
+        scope.append(Rollup.day <= to_date)
+        source.append(reg.entry_date <= to_date)
+
+    db.execute(delete(Rollup).where(*scope))
+
+    procedure = func.coalesce(reg.procedure_name, "")
+    referrer = func.coalesce(reg.referrer_name, "")
+    doctor = func.coalesce(reg.doctor_id, "")
+    aggregate = (
+        select(
+            reg.hospital_id,
+            reg.entry_date,
+            procedure,
+            referrer,
+            doctor,
+            func.coalesce(func.max(reg.doctor_name), ""),
+            func.count(),
+        )
+        .where(*source)
+        .group_by(reg.hospital_id, reg.entry_date, procedure, referrer, doctor)
+    )
+    written = db.execute(
+        Rollup.__table__.insert().from_select(
+            [*_KEY, "doctor_name", "registrations"], aggregate
+        )
+    ).rowcount
+
+    hospitals = Hospital.__table__
+    counters = update(hospitals).values(
+        total_patients=select(func.count())
+        .where(PatientInfo.hospital_id == hospitals.c.id)
+        .scalar_subquery(),
+        total_devices=select(func.count())
+        .where(Device.hospital_id == hospitals.c.id)
+        .scalar_subquery(),
+    )
+    if hospital_id is not None:
+        counters = counters.where(hospitals.c.id == hospital_id)
+    db.execute(counters)
+
+    db.commit()
+    return written
+
+
+# ------------------------------------------------------------------
+# Reports
+# ------------------------------------------------------------------
+
+def _bucket(year: int, month: int, period: str) -> str:
+    if period == "quarter":
+        return f"{year}-Q{(month - 1) // 3 + 1}"
+    if period == "year":
+        return str(year)
+    return f"{year}-{month:02d}"
+
+
+def registration_summary(
+    db: Session,
+    hospital_id: Optional[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+    period: str = "month",
+    group_by: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Registration totals per month/quarter/year, optionally broken down by
+    procedure, referrer or doctor. Reads only rollup rows, so the cost
+    follows the number of days and dimension values, not registrations.
+    """
+    year = extract("year", Rollup.day)
+    month = extract("month", Rollup.day)
+    columns = [year, month]
+    dimension = GROUP_COLUMNS.get(group_by)
+    if dimension is not None:
+        columns.append(dimension)
+
+    query = select(*columns, func.sum(Rollup.registrations))
+    if hospital_id is not None:
+        query = query.where(Rollup.hospital_id == hospital_id)
+    if from_date is not None:
+        query = query.where(Rollup.day >= from_date)
+    if to_date is not None:
+        query = query.where(Rollup.day <= to_date)
+    query = query.group_by(*columns)
+
+    buckets: Dict[str, Dict] = {}
+    for row in db.execute(query):
+        label = _bucket(int(row[0]), int(row[1]), period)
+        bucket = buckets.setdefault(label, {"period": label, "total": 0})
+        count = int(row[-1] or 0)
+        bucket["total"] += count
+        if dimension is not None:
+            breakdown = bucket.setdefault("breakdown", {})
+            breakdown[row[2]] = breakdown.get(row[2], 0) + count
+
+    return [buckets[label] for label in sorted(buckets)]
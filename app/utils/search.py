@@ -0,0 +1,20 @@
+# app/utils/search.py
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def text_match(column, term: str, mode: str = "contains"):
+    """
+    Case-insensitive match of `column` against user input.
+
+    "contains" matches anywhere in the value, "prefix" only at the start
+    (typeahead). On PostgreSQL both are served by the trigram GIN indexes.
+    """
+    pattern = _escape_like(term.strip())
+    if mode == "prefix":
+        pattern = f"{pattern}%"
+    else:
+        pattern = f"%{pattern}%"
+    return column.ilike(pattern, escape="\\")
@@ -1,13 +1,40 @@
+import asyncio
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import jwt
-from typing import Optional
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+)
+
+# bcrypt costs ~100-300 ms of CPU per call, so hashing runs on a dedicated
+# process pool and at most PASSWORD_HASH_CONCURRENCY calls may be queued
+# for it per API worker; extra logins wait instead of piling onto the pool.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_CONCURRENCY = int(
+    os.getenv("PASSWORD_HASH_CONCURRENCY", str(PASSWORD_HASH_WORKERS * 2))
+)
+# The pool starts lazily inside a running API worker (event loop, DB pool,
+# Redis sockets, threads); forking that state into the children is unsafe,
+# so they start fresh, as the RQ workers do (see app/worker.py)
+PASSWORD_HASH_START_METHOD = os.getenv("PASSWORD_HASH_START_METHOD", "spawn")
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+# The limiter: PASSWORD_HASH_CONCURRENCY threads, each waiting on one pool
+# job. Sync and async callers share it, and unlike an asyncio.Semaphore it
+# is not tied to the event loop that first used it.
+_hash_gate: Optional[ThreadPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
 
 def get_token_expiry_minutes() -> int:
     try:
@@ -26,10 +53,73 @@ def verify_password(plain: str, hashed: str) -> bool:
         return False
 
 
+def verify_and_update_password(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify `plain` and, when `hashed` was made with outdated pwd_context
+    settings (e.g. fewer bcrypt rounds), return a replacement hash.
+    """
+    try:
+        return pwd_context.verify_and_update(plain, hashed)
+    except Exception as e:
+        print("Password verify failed:", e)
+        return False, None
+
+
+def _get_hash_pool() -> Tuple[ProcessPoolExecutor, ThreadPoolExecutor]:
+    global _hash_pool, _hash_gate
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context(PASSWORD_HASH_START_METHOD),
+            )
+            _hash_gate = ThreadPoolExecutor(
+                max_workers=PASSWORD_HASH_CONCURRENCY, thread_name_prefix="hash-gate"
+            )
+        return _hash_pool, _hash_gate
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool, _hash_gate
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_gate.shutdown(wait=False, cancel_futures=True)
+            _hash_pool.shutdown(wait=False, cancel_futures=True)
+            _hash_pool = _hash_gate = None
+
+
+def _submit_hash_job(fn, *args):
+    """Queue fn on the hash pool behind the limiter; returns a Future."""
+    pool, gate = _get_hash_pool()
+    return gate.submit(lambda: pool.submit(fn, *args).result())
+
+
+async def _run_in_hash_pool(fn, *args):
+    return await asyncio.wrap_future(_submit_hash_job(fn, *args))
+
+
+async def verify_password_async(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password() on the hash pool, for async endpoints."""
+    return await _run_in_hash_pool(verify_and_update_password, plain, hashed)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(hash_password, password)
+
+
+def hash_password_pooled(password: str) -> str:
+    """
+    hash_password() on the hash pool, for sync endpoints. Blocks only the
+    calling threadpool thread, not the API process's CPU.
+    """
+    return _submit_hash_job(hash_password, password).result()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=get_token_expiry_minutes()))
+    now = datetime.utcnow()
+    expire = now + (expires_delta or timedelta(minutes=get_token_expiry_minutes()))
     to_encode = data.copy()
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": now})
     return jwt.encode(to_encode, os.getenv('SECRET_KEY'), algorithm=os.getenv('ALGORITHM'))
 
 
@@ -0,0 +1,47 @@
+# app/utils/serialization.py
+
+from typing import Any, Iterable, List, Sequence, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+# Built once: serializes plain dicts/lists/dates straight to JSON bytes
+# in pydantic-core, with no model validation in between
+_json = TypeAdapter(Any)
+
+
+class RowSerializer:
+    """
+    Fast path for list endpoints: query only the columns a response schema
+    exposes and turn the rows into dicts keyed like the schema's output.
+
+    The rows come straight from the database with the column types the
+    schema declares, so validating each one through from_attributes (and
+    again against response_model) is skipped.
+    """
+
+    def __init__(self, schema: Type[BaseModel], model):
+        # Output keys use the alias, as FastAPI's response_model does; the
+        # ORM attribute carries the same name (e.g. date -> procedure_date)
+        self.keys = [field.alias or name for name, field in schema.model_fields.items()]
+        self.columns = [getattr(model, key) for key in self.keys]
+
+    def dicts(self, rows: Iterable[Sequence]) -> List[dict]:
+        keys = self.keys
+        return [dict(zip(keys, row)) for row in rows]
+
+    def dict_of(self, obj) -> dict:
+        """One ORM instance, as the same dict a projected row would give."""
+        return {key: getattr(obj, key) for key in self.keys}
+
+
+def json_response(content: Any, status_code: int = 200) -> Response:
+    """
+    JSON response whose body is already final. Returning a Response makes
+    FastAPI bypass response_model, which stays declared for the docs.
+    """
+    return Response(
+        content=_json.dump_json(content),
+        status_code=status_code,
+        media_type="application/json",
+    )
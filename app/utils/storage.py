@@ -0,0 +1,207 @@
+# app/utils/storage.py
+
+import hashlib
+import mimetypes
+import os
+import shutil
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "app/uploads")
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def key_for_src(file_src: str) -> str:
+    """Storage key for a public /uploads/... URL stored on a row."""
+    return file_src.removeprefix("/uploads/")
+
+
+class StorageBackend:
+    """
+    Where media objects live once they leave the API node's disk.
+
+    Keys are paths relative to UPLOAD_DIR ("snapshots/x.png",
+    "recordings/y.webm"), so an object keeps the same key whichever
+    backend holds it.
+    """
+
+    name = "base"
+    is_local = False
+
+    def put_file(self, local_path: str, key: str, metadata: Optional[dict] = None) -> None:
+        raise NotImplementedError
+
+    def head(self, key: str) -> Optional[dict]:
+        """{"size": int, "metadata": dict} for a stored object, None if absent."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def url(self, key: str, expires: int = 3600) -> str:
+        """A URL clients can fetch the object from directly."""
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """Files under UPLOAD_DIR, served by the /uploads static mount."""
+
+    name = "local"
+    is_local = True
+
+    def __init__(self, root: str = UPLOAD_DIR, url_prefix: str = "/uploads"):
+        self.root = root
+        self.url_prefix = url_prefix
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def put_file(self, local_path: str, key: str, metadata: Optional[dict] = None) -> None:
+        dest = self.path(key)
+        if os.path.abspath(local_path) == os.path.abspath(dest):
+            return
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copyfile(local_path, dest)
+
+    def head(self, key: str) -> Optional[dict]:
+        path = self.path(key)
+        if not os.path.isfile(path):
+            return None
+        return {"size": os.path.getsize(path), "metadata": {"sha256": file_sha256(path)}}
+
+    def delete(self, key: str) -> None:
+        path = self.path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def url(self, key: str, expires: int = 3600) -> str:
+        return f"{self.url_prefix}/{key}"
+
+
+class S3Storage(StorageBackend):
+    """
+    Any S3-compatible store (AWS, MinIO, Supabase). Large files are sent
+    as multipart uploads with parts in flight in parallel; downloads go
+    through presigned URLs so bytes never pass through the API.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        part_size: int = 16 * 1024 * 1024,
+        part_concurrency: int = 4,
+    ):
+        import boto3
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.part_size = part_size
+        self.part_concurrency = part_concurrency
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=Config(s3={"addressing_style": "path"} if endpoint_url else {}),
+        )
+
+    def put_file(self, local_path: str, key: str, metadata: Optional[dict] = None) -> None:
+        from boto3.s3.transfer import TransferConfig
+
+        self.client.upload_file(
+            local_path,
+            self.bucket,
+            key,
+            ExtraArgs={
+                "Metadata": metadata or {},
+                "ContentType": mimetypes.guess_type(key)[0] or "application/octet-stream",
+            },
+            Config=TransferConfig(
+                multipart_threshold=self.part_size,
+                multipart_chunksize=self.part_size,
+                max_concurrency=self.part_concurrency,
+            ),
+        )
+
+    def head(self, key: str) -> Optional[dict]:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return {"size": head["ContentLength"], "metadata": head.get("Metadata", {})}
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def url(self, key: str, expires: int = 3600) -> str:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=expires,
+        )
+
+
+def _part_options() -> dict:
+    return {
+        "part_size": int(os.getenv("UPLOAD_PART_SIZE_MB", "16")) * 1024 * 1024,
+        "part_concurrency": int(os.getenv("UPLOAD_PART_CONCURRENCY", "4")),
+    }
+
+
+@lru_cache(maxsize=None)
+def get_storage(name: Optional[str] = None) -> StorageBackend:
+    """
+    Backend by name, defaulting to STORAGE_BACKEND (local | s3 | supabase).
+    """
+    name = (name or os.getenv("STORAGE_BACKEND", "local")).lower()
+
+    if name == "local":
+        return LocalStorage()
+
+    if name == "s3":
+        return S3Storage(
+            bucket=os.getenv("AWS_S3_BUCKET_NAME"),
+            endpoint_url=os.getenv("AWS_S3_ENDPOINT_URL"),  # e.g. MinIO
+            region=os.getenv("AWS_S3_REGION"),
+            access_key=os.getenv("AWS_ACCESS_KEY_ID"),
+            secret_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+            **_part_options(),
+        )
+
+    if name == "supabase":
+        # Supabase Storage speaks the S3 protocol on /storage/v1/s3
+        backend = S3Storage(
+            bucket=os.getenv("SUPABASE_BUCKET"),
+            endpoint_url=os.getenv("SUPABASE_S3_ENDPOINT")
+            or f"{os.getenv('SUPABASE_URL')}/storage/v1/s3",
+            region=os.getenv("SUPABASE_REGION"),
+            access_key=os.getenv("SUPABASE_ACCESS_KEY_ID"),
+            secret_key=os.getenv("SUPABASE_SECRET_KEY"),
+            **_part_options(),
+        )
+        backend.name = "supabase"
+        return backend
+
+    raise ValueError(f"Unknown storage backend: {name}")
@@ -0,0 +1,147 @@
+# app/utils/user_cache.py
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from redis import Redis, RedisError
+
+from app.models.all_models import User
+
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_REDIS_URL = os.getenv("USER_CACHE_REDIS_URL")
+
+_DATETIME_FIELDS = ("date_joined", "last_logout")
+# Credentials never leave the database: no auth check reads them from
+# the cached user, and the Redis copy is shared by every worker
+_SECRET_COLUMNS = ("hashed_password", "show_pwd")
+_COLUMNS = [c.key for c in User.__table__.columns if c.key not in _SECRET_COLUMNS]
+
+
+class UserCache:
+    """
+    Short-TTL cache of User rows keyed on id, so authenticated requests do
+    not need a database round trip. An in-process LRU sits in front of an
+    optional Redis copy shared by all workers.
+
+    Entries hold plain column values; every lookup builds a fresh, detached
+    User so callers can never mutate a shared instance.
+
+    With Redis, invalidate() also bumps a per-user version key, and a local
+    entry is only served while its version still matches. A logout on one
+    worker therefore evicts the user from every worker's LRU on its next
+    request, not after USER_CACHE_TTL.
+    """
+
+    def __init__(self, ttl: int, maxsize: int, redis_url: Optional[str] = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = Redis.from_url(redis_url) if redis_url else None
+
+    @staticmethod
+    def _redis_key(user_id: int) -> str:
+        return f"auth:user:{user_id}"
+
+    @staticmethod
+    def _version_key(user_id: int) -> str:
+        return f"auth:user:{user_id}:v"
+
+    def get(self, user_id: int) -> Optional[User]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is not None:
+            expires_at, version, values = entry
+            if expires_at > now and self._is_current(user_id, version):
+                with self._lock:
+                    if user_id in self._entries:
+                        self._entries.move_to_end(user_id)
+                return User(**values)
+            with self._lock:
+                self._entries.pop(user_id, None)
+
+        values, version = self._redis_get(user_id)
+        if values is None:
+            return None
+        self._store(user_id, version, values)
+        return User(**values)
+
+    def set(self, user: User) -> None:
+        values = {key: getattr(user, key) for key in _COLUMNS}
+        self._store(user.id, self._redis_version(user.id), values)
+        if self._redis is not None:
+            try:
+                self._redis.set(
+                    self._redis_key(user.id),
+                    json.dumps(jsonable_encoder(values)),
+                    ex=self.ttl,
+                )
+            except RedisError:
+                pass
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self._redis is not None:
+            try:
+                # The version only has to outlive local entries, which
+                # expire within ttl of being stored
+                pipe = self._redis.pipeline()
+                pipe.delete(self._redis_key(user_id))
+                pipe.incr(self._version_key(user_id))
+                pipe.expire(self._version_key(user_id), self.ttl)
+                pipe.execute()
+            except RedisError:
+                pass
+
+    def _redis_version(self, user_id: int) -> Optional[bytes]:
+        if self._redis is None:
+            return None
+        try:
+            return self._redis.get(self._version_key(user_id))
+        except RedisError:
+            return None
+
+    def _is_current(self, user_id: int, version: Optional[bytes]) -> bool:
+        if self._redis is None:
+            return True
+        try:
+            return self._redis.get(self._version_key(user_id)) == version
+        except RedisError:
+            # Cannot tell whether another worker invalidated it; reload
+            return False
+
+    def _store(self, user_id: int, version: Optional[bytes], values: dict) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, version, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _redis_get(self, user_id: int) -> Tuple[Optional[dict], Optional[bytes]]:
+        """The shared copy of a user and the version it was read at."""
+        if self._redis is None:
+            return None, None
+        try:
+            raw, version = self._redis.mget(self._redis_key(user_id), self._version_key(user_id))
+        except RedisError:
+            return None, None
+        if raw is None:
+            return None, version
+
+        values = json.loads(raw)
+        for field in _DATETIME_FIELDS:
+            if values.get(field):
+                values[field] = datetime.fromisoformat(values[field])
+        return values, version
+
+
+user_cache = UserCache(USER_CACHE_TTL, USER_CACHE_SIZE, USER_CACHE_REDIS_URL)
@@ -1,12 +1,104 @@
 # app/worker.py
+import argparse
 import multiprocessing
+import os
+import signal
+import time
+
 from redis import Redis
 from rq import Worker, Queue
+
 import app.tasks.sup_upload_tasks as sup_upload_tasks  # This registers the task
+import app.tasks.aws_upload_tasks as aws_upload_tasks
+import app.tasks.offload_tasks as offload_tasks
+import app.tasks.thumbnail_tasks as thumbnail_tasks
+from app.tasks.queues import REDIS_URL
+
+# Highest priority first: a worker always drains earlier queues before later ones
+WORKER_QUEUES = os.getenv("WORKER_QUEUES", "thumbnails,uploads,reports,default")
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "1"))
+WORKER_START_METHOD = os.getenv("WORKER_START_METHOD", "spawn")
+
+# Per-function timing totals, one hash per job function
+METRICS_KEY = "rq:metrics:{}"
+
+
+class TimedWorker(Worker):
+    """RQ worker that records how long each job took, per job function."""
+
+    def perform_job(self, job, queue):
+        started = time.monotonic()
+        ok = False
+        try:
+            ok = super().perform_job(job, queue)
+            return ok
+        finally:
+            elapsed_ms = int((time.monotonic() - started) * 1000)
+            name = job.func_name
+            print(f"[worker] {name} {job.id} {'ok' if ok else 'failed'} in {elapsed_ms} ms")
+            try:
+                key = METRICS_KEY.format(name)
+                pipe = self.connection.pipeline()
+                pipe.hincrby(key, "count", 1)
+                pipe.hincrby(key, "failed", 0 if ok else 1)
+                pipe.hincrby(key, "total_ms", elapsed_ms)
+                pipe.execute()
+                # max is a read-modify-write; a lost race only understates it
+                if elapsed_ms > int(self.connection.hget(key, "max_ms") or 0):
+                    self.connection.hset(key, "max_ms", elapsed_ms)
+            except Exception as e:
+                print(f"[worker] Could not record metrics for {job.id}: {e}")
+
+
+def _work(queue_names, burst: bool):
+    # Own process group, so a terminal Ctrl-C reaches only the launcher,
+    # which forwards it exactly once (a second signal means "abort")
+    os.setpgrp()
+    redis_conn = Redis.from_url(REDIS_URL)
+    queues = [Queue(name, connection=redis_conn) for name in queue_names]
+    worker = TimedWorker(queues, connection=redis_conn)
+    # The scheduler runs delayed retries (exponential backoff on uploads)
+    worker.work(with_scheduler=True, burst=burst)
+
+
+def run_worker():
+    """
+    Entry point for `poetry run start-worker`.
+
+    Starts N worker processes over the named queues. SIGINT/SIGTERM are
+    forwarded to every worker, which finishes its current job and exits
+    (RQ warm shutdown); a second signal makes them abort the job instead.
+    """
+    parser = argparse.ArgumentParser(description="Medfly RQ workers")
+    parser.add_argument("-n", "--processes", type=int, default=WORKER_PROCESSES)
+    parser.add_argument("-q", "--queues", default=WORKER_QUEUES,
+                        help="Comma-separated queue names, highest priority first")
+    parser.add_argument("--burst", action="store_true",
+                        help="Exit once the queues are empty")
+    args = parser.parse_args()
+
+    queue_names = [q.strip() for q in args.queues.split(",") if q.strip()]
+    ctx = multiprocessing.get_context(WORKER_START_METHOD)
+    procs = [
+        ctx.Process(target=_work, args=(queue_names, args.burst), name=f"rq-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for proc in procs:
+        proc.start()
+    print(f"[worker] {len(procs)} worker(s) on {', '.join(queue_names)} ({REDIS_URL})")
+
+    def forward(signum, frame):
+        print(f"[worker] Signal {signum}: draining workers")
+        for proc in procs:
+            if proc.is_alive():
+                os.kill(proc.pid, signum)
+
+    signal.signal(signal.SIGINT, forward)
+    signal.signal(signal.SIGTERM, forward)
+
+    for proc in procs:
+        proc.join()
+
 
 if __name__ == '__main__':
-    multiprocessing.set_start_method("spawn", force=True)
-    redis_conn = Redis()
-    queue = Queue('default', connection=redis_conn)
-    worker = Worker([queue])
-    worker.work()
+    run_worker()
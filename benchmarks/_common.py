@@ -0,0 +1,156 @@
+# benchmarks/_common.py
+"""
+Shared setup for the benchmark scripts (run from the repo root, e.g.
+`python -m benchmarks.insights_summary`).
+
+Import this before anything from app: it points DATABASE_URL at
+BENCH_DATABASE_URL, or a throwaway SQLite file, so a benchmark never
+seeds the database configured in .env.
+"""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Sequence
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL") or "sqlite:///" + os.path.join(
+    tempfile.mkdtemp(prefix="medfly-bench-"), "bench.db"
+)
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from sqlalchemy import event  # noqa: E402
+
+from app.models import all_models as models  # noqa: E402
+from app.models.database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.utils import rollups  # noqa: E402,F401  (session hooks, as in the app)
+
+DAY0 = date(2026, 1, 1)
+INSERT_BATCH = 5000
+
+FIRST_NAMES = [
+    "Aarav", "Ananya", "Arjun", "Diya", "Ishaan", "Kavya", "Meera", "Nikhil",
+    "Priya", "Rahul", "Riya", "Rohan", "Saanvi", "Sneha", "Tanvi", "Vikram",
+]
+LAST_NAMES = [
+    "Agarwal", "Bose", "Chopra", "Das", "Gupta", "Iyer", "Joshi", "Kapoor",
+    "Menon", "Nair", "Patel", "Rao", "Reddy", "Sharma", "Singh", "Verma",
+]
+
+
+def patient_name(p: int) -> str:
+    """A realistic, mostly distinct name for the p-th seeded patient."""
+    first = FIRST_NAMES[p % len(FIRST_NAMES)]
+    last = LAST_NAMES[(p // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    return f"{first} {last} {p}"
+
+
+def reset_schema() -> None:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+
+def create_hospital(name: str = "Bench Hospital") -> int:
+    db = SessionLocal()
+    try:
+        row = models.Hospital(name=name, email="bench@example.com", mobile="0", owner_name="Bench")
+        db.add(row)
+        db.commit()
+        return row.id
+    finally:
+        db.close()
+
+
+def insert_rows(table, rows: Iterable[dict]) -> None:
+    batch = []
+    with engine.begin() as conn:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH:
+                conn.execute(table.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(table.insert(), batch)
+
+
+def seed_registrations(hospital_id: int, count: int, visits_per_patient: int = 5, days: int = 365) -> int:
+    """
+    `count` registrations spread over `days` days, with a PatientInfo row
+    per distinct uid. Core inserts, so this skips the rollup hooks.
+    Returns the number of patients created.
+    """
+    patients = max(1, count // visits_per_patient)
+    insert_rows(models.PatientInfo.__table__, (
+        {
+            "hospital_id": hospital_id, "uid": f"UID-{p}", "name": patient_name(p),
+            "mobile": f"9{p:09d}", "alt_id": "--", "total_visits": visits_per_patient,
+        }
+        for p in range(patients)
+    ))
+    insert_rows(models.PatientRegistration.__table__, (
+        {
+            "hospital_id": hospital_id, "uid": f"UID-{i % patients}", "visit_id": i // patients + 1,
+            "procedure_id": i % 7, "procedure_name": f"Procedure {i % 7}",
+            "doctor_id": f"D{i % 12}", "doctor_name": f"Doctor {i % 12}",
+            "referrer_id": f"R{i % 5}", "referrer_name": f"Referrer {i % 5}", "entry_date": DAY0 + timedelta(days=i % days),
+        }
+        for i in range(count)
+    ))
+    return patients
+
+
+class QueryCounter:
+    """Counts statements sent to the database by either engine."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        for target in (engine, async_engine.sync_engine):
+            event.remove(target, "before_cursor_execute", self._on_execute)
+
+
+@contextmanager
+def timer(samples: List[float]):
+    """Appends the block's wall time, in milliseconds, to samples."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append((time.perf_counter() - start) * 1000)
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50": statistics.median(ordered),
+        "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        "max": ordered[-1],
+    }
+
+
+def print_table(title: str, rows: List[dict], database: bool = True) -> None:
+    print(f"\n{title}  [{engine.dialect.name}]" if database else f"\n{title}")
+    if not rows:
+        return
+    headers = list(rows[0])
+    cells = [[_cell(row[h]) for h in headers] for row in rows]
+    widths = [max(len(h), *(len(c[i]) for c in cells)) for i, h in enumerate(headers)]
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    for c in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(c, widths)))
+
+
+def _cell(value) -> str:
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
@@ -0,0 +1,82 @@
+# benchmarks/auth_cache.py
+"""
+Authenticated request throughput: get_current_user as it was (own session
+and a user query per request) against the cached principal sharing the
+request session. Reports requests/sec and DB queries per request.
+
+    python -m benchmarks.auth_cache --requests 5000
+"""
+import argparse
+import os
+import time
+
+from fastapi import Depends, HTTPException
+from fastapi.testclient import TestClient
+from jose import JWTError, jwt
+
+from benchmarks._common import QueryCounter, SessionLocal, models, print_table, reset_schema
+from app.main import app
+from app.utils.deps import get_current_user, oauth2_scheme
+from app.utils.security import create_access_token
+from app.utils.user_cache import user_cache
+
+PATH = "/api/users/user_profile"
+
+
+def uncached_current_user(token: str = Depends(oauth2_scheme)) -> models.User:
+    """The dependency before caching: a fresh session and query every time."""
+    try:
+        payload = jwt.decode(token, os.getenv("SECRET_KEY"), algorithms=[os.getenv("ALGORITHM")])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.id == int(payload["sub"])).first()
+    finally:
+        db.close()
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return user
+
+
+def measure(client: TestClient, headers: dict, requests: int) -> dict:
+    client.get(PATH, headers=headers)  # warm up (and fill the cache)
+    with QueryCounter() as queries:
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(PATH, headers=headers)
+            assert response.status_code == 200, response.text
+        elapsed = time.perf_counter() - start
+    return {"req/s": requests / elapsed, "queries/req": queries.count / requests}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+
+    reset_schema()
+    db = SessionLocal()
+    user = models.User(fullname="Bench Admin", mobile="0", login_name="bench-admin", is_sadmin=True)
+    db.add(user)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    db.close()
+
+    rows = []
+    with TestClient(app) as client:
+        app.dependency_overrides[get_current_user] = uncached_current_user
+        rows.append({"path": "session + query per request", **measure(client, headers, args.requests)})
+        app.dependency_overrides.clear()
+
+        user_cache.invalidate(user.id)
+        rows.append({"path": "cached principal", **measure(client, headers, args.requests)})
+
+    print_table(f"Authenticated GET {PATH}, {args.requests} sequential requests", rows)
+
+
+if __name__ == "__main__":
+    main()
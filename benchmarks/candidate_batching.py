@@ -0,0 +1,138 @@
+# benchmarks/candidate_batching.py
+"""
+ICE candidate relay with and without batching. Every pair of peers
+trickles candidates to each other, either one "candidate" event each
+(legacy clients) or batched: the client groups candidates in a short
+window and the server coalesces them per receiver. Reports events
+delivered, events/sec and the time until a peer holds all candidates.
+
+    python -m benchmarks.candidate_batching --pairs 200 --candidates 20
+
+Runs one local signaling process (no Redis needed) unless --urls is given.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks._common import percentiles, print_table
+from benchmarks.signaling_load import CONNECT_CONCURRENCY, Peer, spawn_servers
+
+# Same window as queueCandidate() in app/static/video.js
+CLIENT_BATCH_MS = 20
+
+
+async def trickle(peer: Peer, to: str, count: int, gap_ms: float, batched: bool):
+    """Emit `count` candidates gathered gap_ms apart, as a browser would."""
+    pending = []
+    window_start = None
+    for i in range(count):
+        candidate = {"candidate": f"candidate:{i} 1 udp 2122260223 10.0.0.1 {50000 + i} typ host",
+                     "sdpMid": "0", "sdpMLineIndex": 0}
+        if not batched:
+            await peer.client.emit("candidate", {"to": to, "candidate": candidate})
+        else:
+            pending.append(candidate)
+            window_start = window_start or time.perf_counter()
+            if (time.perf_counter() - window_start) * 1000 >= CLIENT_BATCH_MS:
+                await peer.client.emit("candidates", {"to": to, "candidates": pending})
+                pending, window_start = [], None
+        await asyncio.sleep(gap_ms / 1000)
+    if pending:
+        await peer.client.emit("candidates", {"to": to, "candidates": pending})
+
+
+async def run_pair(a: Peer, b: Peer, count: int, gap_ms: float, batched: bool, stats: dict):
+    done = {a: asyncio.Event(), b: asyncio.Event()}
+    received = {a: 0, b: 0}
+
+    def receiver(peer):
+        async def on_candidate(data):
+            stats["events"] += 1
+            received[peer] += 1
+            if received[peer] >= count:
+                done[peer].set()
+
+        async def on_candidates(data):
+            stats["events"] += 1
+            received[peer] += len(data["candidates"])
+            if received[peer] >= count:
+                done[peer].set()
+
+        peer.client.on("candidate", on_candidate)
+        peer.client.on("candidates", on_candidates)
+
+    receiver(a)
+    receiver(b)
+    a_sid, b_sid = a.client.get_sid(), b.client.get_sid()
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        trickle(a, b_sid, count, gap_ms, batched),
+        trickle(b, a_sid, count, gap_ms, batched),
+        done[a].wait(),
+        done[b].wait(),
+    )
+    stats["latencies"].append((time.perf_counter() - start) * 1000)
+    stats["candidates"] += received[a] + received[b]
+
+
+async def drive(url: str, pairs: int, count: int, gap_ms: float, batched: bool, timeout: float) -> dict:
+    peers = [(Peer(url), Peer(url)) for _ in range(pairs)]
+    gate = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    await asyncio.gather(*(p.connect(gate, []) for pair in peers for p in pair))
+    await asyncio.gather(*(
+        p.join(f"batch-room-{i}", role, batch_candidates=batched)
+        for i, (a, b) in enumerate(peers)
+        for p, role in ((a, "broadcaster"), (b, "viewer"))
+    ))
+
+    stats = {"events": 0, "candidates": 0, "latencies": []}
+    start = time.perf_counter()
+    await asyncio.wait_for(
+        asyncio.gather(*(run_pair(a, b, count, gap_ms, batched, stats) for a, b in peers)),
+        timeout,
+    )
+    elapsed = time.perf_counter() - start
+    await asyncio.gather(*(p.client.disconnect() for pair in peers for p in pair))
+
+    return {
+        "mode": "batched" if batched else "per candidate",
+        "events": stats["events"],
+        "candidates": stats["candidates"],
+        "events/s": stats["events"] / elapsed,
+        **{f"all-in {k}": v for k, v in percentiles(stats["latencies"]).items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=20, help="per peer")
+    parser.add_argument("--gap-ms", type=float, default=5, help="time between gathered candidates")
+    parser.add_argument("--urls", nargs=1, help="a running signaling server")
+    parser.add_argument("--base-port", type=int, default=9200)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    def run(url):
+        return [
+            asyncio.run(drive(url, args.pairs, args.candidates, args.gap_ms, batched, args.timeout))
+            for batched in (False, True)
+        ]
+
+    if args.urls:
+        rows = run(args.urls[0])
+    else:
+        # Keep the rate limiter out of the comparison
+        with spawn_servers(None, args.base_port, count=1, CANDIDATE_BURST=str(args.candidates * 2)) as urls:
+            rows = run(urls[0])
+
+    print_table(
+        f"ICE candidates, {args.pairs} pairs x {args.candidates} each way, "
+        f"{args.gap_ms:g} ms apart (ms)",
+        rows, database=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
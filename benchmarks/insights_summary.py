@@ -0,0 +1,88 @@
+# benchmarks/insights_summary.py
+"""
+Insights summary: the old per-row PatientInfo lookup against the joined,
+streamed endpoint. Reports query count, latency and response size.
+
+    python -m benchmarks.insights_summary --sizes 10000 100000
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks._common import (
+    DAY0, QueryCounter, SessionLocal, create_hospital, models, print_table, reset_schema,
+    seed_registrations, timer,
+)
+from app.routers.insights import business_dates_filter
+
+FROM_DATE, TO_DATE = str(DAY0), "2026-12-31"
+
+
+def n_plus_one(hospital_id: int) -> int:
+    """The handler as it was: every registration looks its patient up separately."""
+    db = SessionLocal()
+    try:
+        regs = db.query(models.PatientRegistration).filter(
+            models.PatientRegistration.hospital_id == hospital_id,
+            models.PatientRegistration.entry_date >= FROM_DATE,
+            models.PatientRegistration.entry_date <= TO_DATE,
+        ).all()
+        result = []
+        for pr in regs:
+            pat = db.query(models.PatientInfo).filter_by(uid=pr.uid).first()
+            if pat:
+                result.append({
+                    "uid": pat.uid, "Patient_Name": pat.name, "Alt_Id": pat.alt_id,
+                    "Mobile": pat.mobile, "Entry_Date": str(pr.entry_date),
+                    "Referrer_Name": pr.referrer_name, "Procedure_Name": pr.procedure_name,
+                })
+        return len(json.dumps(result))
+    finally:
+        db.close()
+
+
+def streamed(hospital_id: int) -> int:
+    response = business_dates_filter(
+        hospid=hospital_id, from_date=FROM_DATE, to_date=TO_DATE,
+        selected_procedure=None, selected_referrer=None, format="json",
+    )
+
+    async def consume():
+        size = 0
+        async for chunk in response.body_iterator:
+            size += len(chunk)
+        return size
+
+    return asyncio.run(consume())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-baseline", action="store_true", help="skip the N+1 path (slow at 100k)")
+    args = parser.parse_args()
+
+    paths = [("joined stream", streamed)]
+    if not args.no_baseline:
+        paths.insert(0, ("n+1 lookups", n_plus_one))
+
+    rows = []
+    for size in args.sizes:
+        reset_schema()
+        hospital_id = create_hospital()
+        seed_registrations(hospital_id, size)
+        for label, run in paths:
+            samples = []
+            for _ in range(args.repeat):
+                with QueryCounter() as queries, timer(samples):
+                    body = run(hospital_id)
+            rows.append({
+                "registrations": size, "path": label, "queries": queries.count,
+                "best ms": min(samples), "bytes": body,
+            })
+    print_table("Insights summary", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/list_serialization.py
+"""
+Per-row cost of serving a 100-row list page: ORM objects validated
+against the response model (from_attributes, then jsonable_encoder and
+json.dumps, as FastAPI does for response_model) against projected rows
+dumped by RowSerializer + json_response. Reports microseconds per row for
+serialization alone and for query + serialization.
+
+    python -m benchmarks.list_serialization --page 100
+"""
+import argparse
+import json
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from benchmarks._common import (
+    SessionLocal, insert_rows, create_hospital, models, print_table, reset_schema,
+    seed_registrations, timer,
+)
+from app.routers.devices import device_rows
+from app.routers.patient_registration import registration_rows
+from app.routers.snapshots import snapshot_rows
+from app.schemas import all as schemas
+from app.utils.serialization import json_response
+
+ENDPOINTS = [
+    ("registrations", schemas.PatientRegistration, models.PatientRegistration, registration_rows),
+    ("snapshots", schemas.Snapshots, models.Snapshots, snapshot_rows),
+    ("devices", schemas.Device, models.Device, device_rows),
+]
+
+
+def seed(hospital_id: int, rows: int) -> None:
+    seed_registrations(hospital_id, rows)
+    insert_rows(models.Snapshots.__table__, (
+        {"hospital_id": hospital_id, "uid": f"UID-{i}", "visit_id": 1, "procedure_id": 1,
+         "procedure_datetime": "2026-01-15T10:00:00", "file_src": f"/uploads/snapshots/s{i}.png",
+         "file_thumbnail": f"/uploads/snapshots/s{i}.png", "content_hash": "0" * 64}
+        for i in range(rows)
+    ))
+    insert_rows(models.Device.__table__, (
+        {"hospital_id": hospital_id, "device_id": f"DEV-{i}", "is_default": i == 0}
+        for i in range(rows)
+    ))
+
+
+def validated(db, schema, model, page: int):
+    """The response_model path: ORM rows, validated and encoded per row."""
+    adapter = TypeAdapter(List[schema])
+    objs = db.query(model).limit(page).all()
+
+    def serialize():
+        items = adapter.validate_python(objs, from_attributes=True)
+        return json.dumps(jsonable_encoder(items)).encode()
+
+    return serialize
+
+
+def projected(db, serializer, page: int):
+    rows = db.query(*serializer.columns).limit(page).all()
+
+    def serialize():
+        return json_response(serializer.dicts(rows)).body
+
+    return serialize
+
+
+def measure(build, repeat: int, page: int) -> tuple:
+    serialize_ms, total_ms = [], []
+    for _ in range(repeat):
+        with timer(total_ms):
+            serialize = build()
+            with timer(serialize_ms):
+                body = serialize()
+    per_row = lambda samples: min(samples) * 1000 / page  # noqa: E731
+    return per_row(serialize_ms), per_row(total_ms), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    reset_schema()
+    seed(create_hospital(), max(args.page, 1000))
+
+    rows = []
+    db = SessionLocal()
+    try:
+        for name, schema, model, serializer in ENDPOINTS:
+            for label, build in (
+                ("response_model", lambda: validated(db, schema, model, args.page)),
+                ("projected rows", lambda: projected(db, serializer, args.page)),
+            ):
+                serialize_us, total_us, size = measure(build, args.repeat, args.page)
+                rows.append({
+                    "endpoint": name, "path": label, "serialize us/row": serialize_us,
+                    "query+serialize us/row": total_us, "bytes": size,
+                })
+                db.expunge_all()
+    finally:
+        db.close()
+
+    print_table(f"List serialization, {args.page}-row pages (best of {args.repeat})", rows)
+
+
+if __name__ == "__main__":
+    main()
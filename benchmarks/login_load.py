@@ -0,0 +1,93 @@
+# benchmarks/login_load.py
+"""
+Login latency under N concurrent logins: bcrypt inline on the event loop
+(as before) against the bounded hash process pool. Reports p50/p99 login
+latency and logins/sec per concurrency level.
+
+    python -m benchmarks.login_load --concurrency 1 8 32 --logins 64
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks._common import SessionLocal, models, percentiles, print_table, reset_schema
+from app.main import app
+from app.routers import users
+from app.utils import security
+
+LOGIN_NAME, PASSWORD = "bench-login", "bench-password"
+
+
+async def inline_verify(plain: str, hashed: str):
+    """The old login path: bcrypt runs on the event loop itself."""
+    return security.verify_and_update_password(plain, hashed)
+
+
+async def run_level(concurrency: int, logins: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login():
+            async with gate:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/api/users/login", json={"login_name": LOGIN_NAME, "password": PASSWORD}
+                )
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.text
+
+        await login()  # warm up the pool and the connection
+        latencies.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+
+    return {**percentiles(latencies), "logins/s": logins / elapsed}
+
+
+async def run_all(levels, logins: int) -> list:
+    """Every level on one event loop, which the async engine's pool is bound to."""
+    pooled = users.verify_password_async
+    rows = []
+    try:
+        for label, verify in (("inline bcrypt", inline_verify), ("hash pool", pooled)):
+            users.verify_password_async = verify
+            for concurrency in levels:
+                result = await run_level(concurrency, logins)
+                rows.append({"path": label, "concurrency": concurrency, **result})
+    finally:
+        users.verify_password_async = pooled
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--logins", type=int, default=64)
+    args = parser.parse_args()
+
+    reset_schema()
+    db = SessionLocal()
+    db.add(models.User(
+        fullname="Bench", mobile="0", login_name=LOGIN_NAME,
+        hashed_password=security.hash_password(PASSWORD),
+    ))
+    db.commit()
+    db.close()
+
+    rows = asyncio.run(run_all(args.concurrency, args.logins))
+    security.shutdown_hash_pool()
+
+    print_table(
+        f"POST /api/users/login, {args.logins} logins per level, "
+        f"{security.PASSWORD_HASH_WORKERS} hash workers (ms)",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
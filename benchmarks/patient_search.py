@@ -0,0 +1,88 @@
+# benchmarks/patient_search.py
+"""
+find-patients name search with and without the trigram indexes, in
+contains and prefix (typeahead) mode. Reports latency per search term.
+
+    BENCH_DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.patient_search --patients 1000000
+
+The "before" row drops the *_trgm indexes to get the old plan back. On
+SQLite those are plain indexes that ILIKE cannot use, so all rows match.
+"""
+import argparse
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from benchmarks._common import (
+    SessionLocal, create_hospital, engine, models, percentiles, print_table, reset_schema,
+    seed_registrations, timer,
+)
+from app.routers.patient_registration import _find_patients_filters
+from app.utils.patients import patient_info_join
+
+SADMIN = SimpleNamespace(is_sadmin=True, hspId=None)
+TERMS = ["Kavya Re", "Priya Sharma 12", "Vikram"]
+PAGE = 51
+
+TRIGRAM_INDEXES = [
+    index
+    for table in (models.PatientInfo.__table__, models.PatientRegistration.__table__)
+    for index in table.indexes
+    if index.name.endswith("_trgm")
+]
+
+
+def search(db, term: str, match: str):
+    """The find-patients main query (with_total=false), first page."""
+    query = _find_patients_filters(
+        select(models.PatientRegistration, models.PatientInfo)
+        .join(models.PatientInfo, patient_info_join(), isouter=True),
+        SADMIN, None, None, None, term, None, None, match,
+    )
+    return db.execute(query.order_by(models.PatientRegistration.id).limit(PAGE)).all()
+
+
+def run(label: str, match: str, repeat: int):
+    rows = []
+    db = SessionLocal()
+    try:
+        for term in TERMS:
+            search(db, term, match)  # warm up
+            samples = []
+            for _ in range(repeat):
+                with timer(samples):
+                    found = search(db, term, match)
+            rows.append({"path": label, "term": term, "hits": len(found), **percentiles(samples)})
+    finally:
+        db.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    reset_schema()
+    seed_registrations(create_hospital(), args.patients * 2, visits_per_patient=2)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+    for index in TRIGRAM_INDEXES:
+        index.drop(engine)
+    rows = run("before: no trigram index", "contains", args.repeat)
+    for index in TRIGRAM_INDEXES:
+        index.create(engine)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+    rows += run("after: contains", "contains", args.repeat)
+    rows += run("after: prefix", "prefix", args.repeat)
+
+    print_table(f"find-patients name search, {args.patients} patients (ms)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# benchmarks/signaling_load.py
+"""
+Signaling load test across processes: thousands of simulated peers, one
+broadcaster/viewer pair per room, with the two halves of every pair
+connected to different Socket.IO processes so each relay crosses Redis.
+Reports connect time, setup latency (viewer_ready -> offer -> answer)
+and relayed messages/sec.
+
+Start two local processes sharing a Redis and drive them:
+
+    python -m benchmarks.signaling_load --spawn --redis-url redis://localhost:6379/0 --peers 2000
+
+or point it at servers that are already running:
+
+    python -m benchmarks.signaling_load --urls http://127.0.0.1:9000 http://127.0.0.1:9001
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import socketio
+
+from benchmarks._common import percentiles, print_table
+
+# Peers connecting at once; beyond this they queue client-side
+CONNECT_CONCURRENCY = 200
+
+
+@contextmanager
+def spawn_servers(redis_url: Optional[str], base_port: int, count: int = 2, **settings):
+    """
+    `count` signaling processes on consecutive ports, sharing redis_url
+    (a single process may run without one). settings are extra env vars.
+    """
+    env = {**os.environ, "SIO_TRANSPORTS": "websocket", "PYTHONUNBUFFERED": "1", **settings}
+    env.pop("SIO_REDIS_URL", None)
+    if redis_url:
+        env["SIO_REDIS_URL"] = redis_url
+    ports = [base_port + i for i in range(count)]
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.socket_server:sio_app",
+             "--port", str(port), "--log-level", "warning"],
+            env=env, stdout=subprocess.DEVNULL,
+        )
+        for port in ports
+    ]
+    try:
+        for port in ports:
+            _wait_for_port(port)
+        yield [f"http://127.0.0.1:{port}" for port in ports]
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait(timeout=10)
+
+
+def _wait_for_port(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError(f"signaling server on port {port} did not start")
+
+
+class Peer:
+    def __init__(self, url: str):
+        self.url = url
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.joined = asyncio.Event()
+        self.client.on("peers", self._on_peers)
+
+    async def _on_peers(self, data):
+        self.joined.set()
+
+    async def connect(self, gate: asyncio.Semaphore, samples: list):
+        async with gate:
+            start = time.perf_counter()
+            await self.client.connect(self.url, transports=["websocket"])
+            samples.append((time.perf_counter() - start) * 1000)
+
+    async def join(self, room: str, role: str, **extra):
+        await self.client.emit("join", {"room": room, "role": role, **extra})
+        await self.joined.wait()
+
+
+async def run_pair(broadcaster: Peer, viewer: Peer, room: str, latencies: list, counter: list):
+    answered = asyncio.Event()
+
+    async def on_viewer_ready(data):
+        counter[0] += 1
+        await broadcaster.client.emit("offer", {"to": data["viewer_id"], "offer": {"type": "offer", "sdp": "v=0"}})
+
+    async def on_offer(data):
+        counter[0] += 1
+        await viewer.client.emit("answer", {"to": data["from"], "answer": {"type": "answer", "sdp": "v=0"}})
+
+    async def on_answer(data):
+        counter[0] += 1
+        answered.set()
+
+    broadcaster.client.on("viewer-ready", on_viewer_ready)
+    viewer.client.on("offer", on_offer)
+    broadcaster.client.on("answer", on_answer)
+
+    start = time.perf_counter()
+    await viewer.client.emit("viewer_ready", {"room": room})
+    await answered.wait()
+    latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def drive(urls, peers: int, timeout: float) -> list:
+    pairs = []
+    for i in range(peers // 2):
+        # Broadcaster and viewer always sit on different processes
+        pairs.append((Peer(urls[i % len(urls)]), Peer(urls[(i + 1) % len(urls)]), f"bench-room-{i}"))
+    everyone = [p for b, v, _ in pairs for p in (b, v)]
+
+    gate = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    connects = []
+    start = time.perf_counter()
+    await asyncio.gather(*(p.connect(gate, connects) for p in everyone))
+    connect_s = time.perf_counter() - start
+
+    await asyncio.gather(*(
+        peer.join(room, role)
+        for b, v, room in pairs
+        for peer, role in ((b, "broadcaster"), (v, "viewer"))
+    ))
+
+    latencies, counter = [], [0]
+    start = time.perf_counter()
+    await asyncio.wait_for(
+        asyncio.gather(*(run_pair(b, v, room, latencies, counter) for b, v, room in pairs)),
+        timeout,
+    )
+    setup_s = time.perf_counter() - start
+
+    await asyncio.gather(*(p.client.disconnect() for p in everyone))
+    return [
+        {"phase": "connect", "peers": len(everyone), **percentiles(connects), "per sec": len(everyone) / connect_s},
+        {"phase": "setup", "peers": len(everyone), **percentiles(latencies), "per sec": counter[0] / setup_s},
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--peers", type=int, default=2000)
+    parser.add_argument("--urls", nargs="+", help="running signaling servers (default: --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="start two local processes")
+    parser.add_argument("--redis-url", default=os.getenv("SIO_REDIS_URL", "redis://localhost:6379/0"))
+    parser.add_argument("--base-port", type=int, default=9100)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    if args.urls and not args.spawn:
+        rows = asyncio.run(drive(args.urls, args.peers, args.timeout))
+    else:
+        with spawn_servers(args.redis_url, args.base_port) as urls:
+            rows = asyncio.run(drive(urls, args.peers, args.timeout))
+
+    # "per sec" is peers connected/sec for connect, relayed messages/sec for setup
+    print_table(f"Signaling across processes, {args.peers} peers (ms)", rows, database=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/snapshot_upload.py
+"""
+Memory profile of a large snapshot upload: the base64-in-JSON endpoint
+against the streamed multipart endpoint. Reports the peak Python memory
+allocated while the app handles one frame, and the request latency.
+
+    python -m benchmarks.snapshot_upload --mb 20
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import httpx
+
+from benchmarks._common import print_table, reset_schema
+from app.main import app
+from app.routers import snapshots
+
+BOUNDARY = "medfly-bench-boundary"
+# Bodies reach the app in pieces, as they would off a socket
+WIRE_CHUNK = 64 * 1024
+FIELDS = {"hospital_id": "1", "uid": "UID-1", "visit_id": "1"}
+
+
+def base64_request(frame: bytes) -> dict:
+    body = json.dumps({
+        **FIELDS, "filename": "bench_b64.png",
+        "Img": "data:image/png;base64," + base64.b64encode(frame).decode(),
+    }).encode()
+    return {"url": "/api/save-snapshots/", "content": body,
+            "headers": {"Content-Type": "application/json"}}
+
+
+def multipart_request(frame: bytes) -> dict:
+    parts = [
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode()
+        for k, v in FIELDS.items()
+    ]
+    parts.append(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="bench_mp.png"\r\n'
+        "Content-Type: image/png\r\n\r\n".encode() + frame + f"\r\n--{BOUNDARY}--\r\n".encode()
+    )
+    return {"url": "/api/save-snapshots/upload", "content": b"".join(parts),
+            "headers": {"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}}
+
+
+async def _wire(body: bytes):
+    view = memoryview(body)
+    for offset in range(0, len(body), WIRE_CHUNK):
+        yield bytes(view[offset:offset + WIRE_CHUNK])
+
+
+async def upload(request: dict) -> tuple:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        response = await client.post(
+            request["url"], content=_wire(request["content"]), headers=request["headers"]
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    assert response.status_code == 200, response.text
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mb", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ["UPLOAD_DIR"] = tempfile.mkdtemp(prefix="medfly-bench-uploads-")
+    # Thumbnails are a separate worker's job; keep Redis out of the numbers
+    snapshots._enqueue_thumbnails = lambda snapshot_id: None
+    reset_schema()
+
+    frame = os.urandom(args.mb * 1024 * 1024)
+    rows = []
+    tracemalloc.start()
+    for label, build in (("base64 JSON", base64_request), ("multipart stream", multipart_request)):
+        request = build(frame)
+        results = [asyncio.run(upload(request)) for _ in range(args.repeat)]
+        peak = min(p for p, _ in results)
+        rows.append({
+            "path": label, "body MB": len(request["content"]) / 2**20,
+            "peak MB": peak / 2**20, "best ms": min(ms for _, ms in results),
+        })
+        del request
+    tracemalloc.stop()
+
+    print_table(f"Snapshot upload, {args.mb} MB frame", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# tests/conftest.py
+import os
+import tempfile
+
+import pytest
+
+# app.models.database builds its engines from DATABASE_URL at import time,
+# and .env points at a real database. Always override it before any app
+# import: TEST_DATABASE_URL (a throwaway Postgres database, needed by the
+# postgres-only tests) or a temporary SQLite file.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL") or "sqlite:///" + os.path.join(
+    tempfile.mkdtemp(prefix="medfly-tests-"), "test.db"
+)
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from app.models import all_models as models  # noqa: E402
+from app.models.database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.utils import rollups  # noqa: E402,F401  (registers the after_flush hook)
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def pg_engine(db_engine):
+    """The test engine, for tests that only mean something on PostgreSQL."""
+    if db_engine.dialect.name != "postgresql":
+        pytest.skip("needs TEST_DATABASE_URL pointing at a PostgreSQL database")
+    return db_engine
+
+
+@pytest.fixture(scope="module")
+def api_client(db_engine):
+    """
+    A TestClient for the app. Each client runs its own event loop, so the
+    async connections pooled on it are dropped (not closed: that loop is
+    gone) before another module's client could pick them up.
+    """
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+    async_engine.sync_engine.dispose(close=False)
+
+
+@pytest.fixture
+def hospital(db_engine):
+    """A fresh hospital id; its patients and registrations are removed afterwards."""
+    db = SessionLocal()
+    row = models.Hospital(name="Test Hospital", email="test@example.com", mobile="0000000000", owner_name="Test")
+    db.add(row)
+    db.commit()
+    hospital_id = row.id
+    db.close()
+
+    yield hospital_id
+
+    with engine.begin() as conn:
+        for model in (models.PatientRegistration, models.RegistrationDailyRollup, models.PatientInfo):
+            conn.execute(model.__table__.delete().where(model.__table__.c.hospital_id == hospital_id))
+        conn.execute(models.Hospital.__table__.delete().where(models.Hospital.__table__.c.id == hospital_id))
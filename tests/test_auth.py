@@ -0,0 +1,89 @@
+# tests/test_auth.py
+"""Token revocation on logout, and the user cache that fronts it."""
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app.models import all_models as models
+from app.models.database import SessionLocal
+from app.utils.deps import get_current_user, hospital_scope_required
+from app.utils.user_cache import UserCache, user_cache
+
+SECRET, ALGORITHM = "test-secret", "HS256"
+# A logout three quarters of the way through a recent second
+LOGOUT_SECOND = int(time.time()) - 60
+
+
+@pytest.fixture
+def logged_out_user(db_engine, monkeypatch):
+    """A user who logged out at LOGOUT_SECOND + 0.75."""
+    monkeypatch.setenv("SECRET_KEY", SECRET)
+    monkeypatch.setenv("ALGORITHM", ALGORITHM)
+    db = SessionLocal()
+    user = models.User(
+        fullname="Auth Test", mobile="0", login_name=f"auth-test-{os.getpid()}",
+        last_logout=datetime.fromtimestamp(LOGOUT_SECOND + 0.75, timezone.utc).replace(tzinfo=None),
+    )
+    db.add(user)
+    db.commit()
+    user_cache.invalidate(user.id)
+    yield db, user
+    user_cache.invalidate(user.id)
+    db.delete(user)
+    db.commit()
+    db.close()
+
+
+def _token(user_id: int, iat: int) -> str:
+    return jwt.encode({"sub": str(user_id), "iat": iat, "exp": iat + 3600}, SECRET, algorithm=ALGORITHM)
+
+
+def test_login_in_the_logout_second_is_accepted(logged_out_user):
+    db, user = logged_out_user
+    # Logout then login within one second: iat truncates to the same second
+    assert get_current_user(_token(user.id, LOGOUT_SECOND), db).id == user.id
+
+
+def test_tokens_from_before_the_logout_are_revoked(logged_out_user):
+    db, user = logged_out_user
+    with pytest.raises(HTTPException) as exc:
+        get_current_user(_token(user.id, LOGOUT_SECOND - 1), db)
+    assert exc.value.status_code == 401
+
+
+@pytest.fixture
+def redis_url():
+    url = os.getenv("TEST_REDIS_URL")
+    if not url:
+        pytest.skip("needs TEST_REDIS_URL pointing at a scratch Redis database")
+    return url
+
+
+def test_invalidation_reaches_every_worker(redis_url):
+    # Two workers' caches sharing one Redis
+    worker_a = UserCache(ttl=60, maxsize=16, redis_url=redis_url)
+    worker_b = UserCache(ttl=60, maxsize=16, redis_url=redis_url)
+    user = models.User(id=987654, fullname="Cached", mobile="0", login_name="cached")
+    worker_a.invalidate(user.id)
+
+    worker_a.set(user)
+    assert worker_b.get(user.id).fullname == "Cached"  # now in B's local LRU
+
+    # e.g. /logout handled by worker A
+    worker_a.invalidate(user.id)
+    assert worker_b.get(user.id) is None
+    assert worker_a.get(user.id) is None
+
+
+def test_hospital_admins_are_scoped_to_their_hospital():
+    hadmin = models.User(id=1, is_sadmin=False, is_hadmin=True, hspId="3")
+    sadmin = models.User(id=2, is_sadmin=True, is_hadmin=False, hspId=None)
+    assert hospital_scope_required(hospid=3, user=hadmin) is hadmin
+    assert hospital_scope_required(hospid=4, user=sadmin) is sadmin
+    with pytest.raises(HTTPException) as exc:
+        hospital_scope_required(hospid=4, user=hadmin)
+    assert exc.value.status_code == 403
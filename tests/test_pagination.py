@@ -0,0 +1,94 @@
+# tests/test_pagination.py
+"""Keyset pagination: cursor walks against offset pages."""
+import asyncio
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.models import all_models as models
+from app.models.database import AsyncSessionLocal, SessionLocal, async_engine
+from app.utils.pagination import cursor_param, decode_cursor, encode_cursor, paginate, paginate_async
+
+Reg = models.PatientRegistration
+
+
+@pytest.fixture
+def registrations(hospital):
+    """Ten registrations for one doctor, four of them without an entry_date."""
+    db = SessionLocal()
+    for i in range(10):
+        db.add(Reg(
+            hospital_id=hospital, uid=f"UID-{i}", visit_id=1, doctor_id="D1",
+            entry_date=None if i % 3 == 0 else date(2026, 1, 1 + i % 4),
+        ))
+    db.commit()
+    yield db, db.query(Reg).filter(Reg.hospital_id == hospital)
+    db.close()
+
+
+def _walk(query, descending: bool, **kwargs) -> list:
+    seen, cursor = [], None
+    while True:
+        page = paginate(
+            query, (Reg.entry_date, Reg.id), key=lambda r: (r.entry_date, r.id),
+            limit=3, cursor=cursor, descending=descending, **kwargs,
+        )
+        seen += [r.id for r in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return seen
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_cursor_walk_covers_undated_rows(registrations, descending):
+    db, query = registrations
+    offset_pages = [
+        r.id for offset in range(0, 10, 3)
+        for r in paginate(
+            query, (Reg.entry_date, Reg.id), key=lambda r: (r.entry_date, r.id),
+            limit=3, offset=offset, descending=descending, nullable_lead=True,
+        )["items"]
+    ]
+    walked = _walk(query, descending, nullable_lead=True)
+    assert len(walked) == 10
+    assert walked == offset_pages
+
+
+def test_date_cursor_round_trip():
+    cursor = encode_cursor((date(2026, 1, 31), 42))
+    assert decode_cursor(cursor, 2) == ["2026-01-31", 42]
+    # Bound back with the column's type, not as a bare string
+    bound = cursor_param(Reg.entry_date, "2026-01-31")
+    assert bound.value == date(2026, 1, 31)
+    assert isinstance(bound.type, type(Reg.entry_date.type))
+
+    with pytest.raises(HTTPException) as exc:
+        cursor_param(Reg.entry_date, "not-a-date")
+    assert exc.value.status_code == 400
+
+
+def test_async_cursor_walk_on_a_date_key(registrations):
+    """asyncpg refuses a str parameter for a date column; walk via paginate_async."""
+    _, query = registrations
+    hospital_id = query.first().hospital_id
+    stmt = select(Reg).where(Reg.hospital_id == hospital_id, Reg.entry_date.isnot(None))
+
+    async def walk():
+        seen, cursor = [], None
+        async with AsyncSessionLocal() as db:
+            while True:
+                page = await paginate_async(
+                    db, stmt, (Reg.entry_date, Reg.id), key=lambda r: (r.entry_date, r.id),
+                    limit=2, cursor=cursor, with_total=False,
+                )
+                seen += [r.id for r in page["items"]]
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+        await async_engine.dispose()
+        return seen
+
+    expected = [r.id for r in query.filter(Reg.entry_date.isnot(None)).order_by(Reg.entry_date.desc(), Reg.id.desc())]
+    assert asyncio.run(walk()) == expected
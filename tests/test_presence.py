@@ -0,0 +1,68 @@
+# tests/test_presence.py
+"""The Redis mirror of signaling rooms: empty rooms and dead processes."""
+import asyncio
+import os
+import time
+
+import pytest
+from redis.asyncio import Redis
+
+from app.utils.presence import BROADCASTER, VIEWER, RoomRegistry
+
+PREFIX = f"presence:test:{os.getpid()}"
+
+
+@pytest.fixture
+def redis_url():
+    url = os.getenv("TEST_REDIS_URL")
+    if not url:
+        pytest.skip("needs TEST_REDIS_URL pointing at a scratch Redis database")
+    return url
+
+
+def _run(redis_url, scenario):
+    async def main():
+        redis = Redis.from_url(redis_url)
+        try:
+            return await scenario(redis)
+        finally:
+            for key in await redis.keys(f"{PREFIX}:*"):
+                await redis.delete(key)
+            await redis.aclose()
+    return asyncio.run(main())
+
+
+def test_leaving_the_last_member_forgets_the_room(redis_url):
+    async def scenario(redis):
+        a = RoomRegistry(redis=redis, stale_after=60, prefix=PREFIX)
+        b = RoomRegistry(redis=redis, stale_after=60, prefix=PREFIX)
+        await a.join("sid-a", "room-1", BROADCASTER)
+        await b.join("sid-b", "room-1", VIEWER)
+
+        await a.leave("sid-a")
+        assert await a.rooms() == ["room-1"]  # sid-b is still in it
+        await b.leave("sid-b")
+        assert await a.rooms() == []
+
+    _run(redis_url, scenario)
+
+
+def test_members_of_a_dead_process_are_pruned(redis_url):
+    async def scenario(redis):
+        alive = RoomRegistry(redis=redis, stale_after=60, prefix=PREFIX)
+        dead = RoomRegistry(redis=redis, stale_after=60, prefix=PREFIX)
+        observer = RoomRegistry(redis=redis, stale_after=60, prefix=PREFIX)
+        await alive.join("sid-alive", "room-1", BROADCASTER)
+        await dead.join("sid-dead", "room-2", VIEWER)
+        # Both mirrored long ago; only the live process re-stamps its own
+        for registry, room, sid in ((alive, "room-1", "sid-alive"), (dead, "room-2", "sid-dead")):
+            member = registry._rooms[room][sid]
+            member.last_seen = time.time() - 120
+            await registry._mirror(room, sid, member)
+        await alive.refresh()
+
+        await observer.prune()
+        assert await observer.rooms() == ["room-1"]
+        assert list(await observer.members("room-1")) == ["sid-alive"]
+
+    _run(redis_url, scenario)
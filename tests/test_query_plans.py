@@ -0,0 +1,193 @@
+# tests/test_query_plans.py
+"""
+Query-plan regression checks: call each hot endpoint, capture the SELECTs
+it runs and EXPLAIN them on PostgreSQL, asserting that each of them on
+the table under test is served by some index, and that the index added
+for that lookup serves at least one of them.
+
+Sequential and plain index scans are disabled while explaining, leaving
+bitmap index scans, which only exist with an index condition. So the seed
+data can stay small: the question asked is whether an index can filter on
+the query's predicates at all, which is what breaks when an index is
+dropped or a query is reshaped.
+"""
+import json
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.util import find_tables
+
+from app.main import app
+from app.models import all_models as models
+from app.models.database import SessionLocal, async_engine, engine
+from app.utils.deps import get_current_user
+from app.utils.rollups import rebuild_rollups
+
+HOSPITALS = 5
+PATIENTS_PER_HOSPITAL = 40
+VISITS_PER_PATIENT = 5
+DAY0 = date(2026, 1, 1)
+
+# (method, path, body, as system admin), table the main query reads,
+# index expected to serve it
+CASES = {
+    "patient-registration by uid": (
+        ("GET", "/api/patient-registration/?hospid={hospital}&mfid=UID-7", None, False),
+        "patient_registration",
+        "ix_patient_registration_hospital_uid",
+    ),
+    "patient-visits: patient master": (
+        ("GET", "/api/patient-visits/UID-7", None, False),
+        "patient_info",
+        "uq_patient_info_hospital_uid",
+    ),
+    "patient-visits: visits": (
+        ("GET", "/api/patient-visits/UID-7", None, False),
+        "patient_registration",
+        "ix_patient_registration_hospital_uid",
+    ),
+    # Across hospitals, so the name is the only selective predicate
+    "find-patients prefix name search": (
+        ("GET", "/api/find-patients/?patient_name=Patient 7&match=prefix&with_total=false", None, True),
+        "patient_info",
+        "ix_patient_info_name_trgm",
+    ),
+    "snapshots by uid": (
+        ("GET", "/api/snapshots/?hospid={hospital}&mfid=UID-7", None, False),
+        "snapshots",
+        "ix_snapshots_hospital_uid_visit",
+    ),
+    "registration summary": (
+        ("GET", "/api/dashboard/registrations/summary?hospital_id={hospital}&from_date=2026-01-01&to_date=2026-01-31", None, True),
+        "registration_daily_rollups",
+        "uq_registration_daily_rollup",
+    ),
+    "insights: doctor workload": (
+        ("GET", "/api/insights/user-based-data/?hospid={hospital}&user_id=D1&from_date=2026-01-01&to_date=2026-01-31&with_total=false", None, False),
+        "patient_registration",
+        "ix_patient_registration_hospital_doctor_entry_date",
+    ),
+    "insights: summary by dates": (
+        ("POST", "/api/insights/summary-dates-filter?hospid={hospital}&from_date=2026-01-01&to_date=2026-01-31", None, False),
+        "patient_registration",
+        "ix_patient_registration_hospital_entry_date",
+    ),
+    "login": (
+        ("POST", "/api/users/login", {"login_name": "plan-test-login", "password": "x"}, False),
+        "users",
+        "ix_users_login_name",
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def seeded(pg_engine):
+    """A few hospitals with enough patients, visits and snapshots to plan against."""
+    db = SessionLocal()
+    hospital_ids = []
+    for h in range(HOSPITALS):
+        row = models.Hospital(name=f"Plan {h}", email="plan@example.com", mobile="0", owner_name="Plan")
+        db.add(row)
+        db.flush()
+        hospital_ids.append(row.id)
+    for hospital_id in hospital_ids:
+        for p in range(PATIENTS_PER_HOSPITAL):
+            uid = f"UID-{p}"
+            db.add(models.PatientInfo(
+                hospital_id=hospital_id, uid=uid, name=f"Patient {p}",
+                mobile="0", total_visits=VISITS_PER_PATIENT,
+            ))
+            for v in range(1, VISITS_PER_PATIENT + 1):
+                db.add(models.PatientRegistration(
+                    hospital_id=hospital_id, uid=uid, visit_id=v, procedure_id=1,
+                    procedure_name=f"Procedure {v}", doctor_id=f"D{p % 4}",
+                    doctor_name=f"Doctor {p % 4}", referrer_name="Self",
+                    entry_date=DAY0 + timedelta(days=(p + v) % 60),
+                ))
+                db.add(models.Snapshots(hospital_id=hospital_id, uid=uid, visit_id=v, file_src=f"{hospital_id}-{uid}-{v}.jpg"))
+    db.commit()
+    for hospital_id in hospital_ids:
+        rebuild_rollups(db, hospital_id)
+    db.close()
+
+    with engine.begin() as conn:
+        for table in ("hospitals", "patient_info", "patient_registration", "snapshots", "registration_daily_rollups", "users"):
+            conn.exec_driver_sql(f"ANALYZE {table}")
+
+    yield hospital_ids
+
+    with engine.begin() as conn:
+        for model in (models.Snapshots, models.PatientRegistration, models.RegistrationDailyRollup, models.PatientInfo):
+            conn.execute(model.__table__.delete().where(model.__table__.c.hospital_id.in_(hospital_ids)))
+        conn.execute(models.Hospital.__table__.delete().where(models.Hospital.__table__.c.id.in_(hospital_ids)))
+
+
+@pytest.fixture(scope="module")
+def user(seeded):
+    """The authenticated user; a hospital admin of the first hospital."""
+    user = SimpleNamespace(id=0, is_sadmin=False, is_hadmin=True, hspId=str(seeded[0]))
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield user
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def captured_selects():
+    """SELECT statements executed on either engine while the test runs."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        compiled = getattr(context, "compiled", None)
+        if compiled is not None and isinstance(compiled.statement, Select):
+            statements.append(compiled.statement)
+
+    targets = (engine, async_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", capture)
+    yield statements
+    for target in targets:
+        event.remove(target, "before_cursor_execute", capture)
+
+
+def _index_names(plan: dict):
+    if "Index Name" in plan:
+        yield plan["Index Name"]
+    for child in plan.get("Plans", []):
+        yield from _index_names(child)
+
+
+def _explain(statement: Select) -> dict:
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        for scan in ("seqscan", "indexscan", "indexonlyscan"):
+            conn.exec_driver_sql(f"SET LOCAL enable_{scan} = off")
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql).scalar()
+        conn.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+@pytest.mark.parametrize("case", CASES.keys())
+def test_endpoint_query_uses_index(case, seeded, user, api_client, captured_selects):
+    (method, path, body, as_sadmin), table, index = CASES[case]
+    user.is_sadmin = as_sadmin
+    response = api_client.request(method, path.format(hospital=seeded[0]), json=body)
+    # 404 is fine (e.g. unknown login); auth or server errors mean the
+    # main query never ran
+    assert response.status_code in (200, 404), response.text
+
+    reads = [s for s in captured_selects if table in {t.name for t in find_tables(s, include_joins=True) if hasattr(t, "name")}]
+    assert reads, f"no SELECT on {table} captured for {case}"
+
+    # Every query the endpoint ran against this table must be index-served,
+    # and the index added for this lookup must serve at least one of them
+    used = set()
+    for statement in reads:
+        indexes = set(_index_names(_explain(statement)))
+        assert indexes, f"{case}: no index serves\n{statement}"
+        used |= indexes
+    assert index in used, f"{case}: expected {index}, plans used {sorted(used)}"
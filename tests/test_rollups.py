@@ -0,0 +1,66 @@
+# tests/test_rollups.py
+"""The after_flush hook keeping registration_daily_rollups in step with the ORM."""
+from datetime import date
+
+from app.models import all_models as models
+from app.models.database import SessionLocal
+from app.utils.rollups import rebuild_rollups
+
+DAY1, DAY2 = date(2026, 3, 1), date(2026, 3, 2)
+
+
+def _counts(db, hospital_id: int) -> dict:
+    rows = db.query(models.RegistrationDailyRollup).filter_by(hospital_id=hospital_id)
+    return {(r.day, r.procedure_name, r.doctor_id): r.registrations for r in rows if r.registrations}
+
+
+def test_insert_update_delete_keep_rollups_current(hospital):
+    db = SessionLocal()
+    try:
+        reg = models.PatientRegistration(
+            hospital_id=hospital, uid="UID-1", visit_id=1, procedure_name="Scan",
+            doctor_id="D1", doctor_name="Doctor", referrer_name="Self", entry_date=DAY1,
+        )
+        db.add(reg)
+        db.commit()
+        assert _counts(db, hospital) == {(DAY1, "Scan", "D1"): 1}
+
+        # Committing expired reg, so the old key is no longer in memory
+        reg.entry_date = DAY2
+        db.commit()
+        assert _counts(db, hospital) == {(DAY2, "Scan", "D1"): 1}
+
+        reg.procedure_name = "Biopsy"
+        db.commit()
+        assert _counts(db, hospital) == {(DAY2, "Biopsy", "D1"): 1}
+
+        db.delete(reg)
+        db.commit()
+        assert _counts(db, hospital) == {}
+    finally:
+        db.close()
+
+
+def test_incremental_rollups_match_a_rebuild(hospital):
+    db = SessionLocal()
+    try:
+        regs = [
+            models.PatientRegistration(
+                hospital_id=hospital, uid=f"UID-{i}", visit_id=1, procedure_name="Scan",
+                doctor_id=f"D{i % 2}", doctor_name="Doctor", referrer_name="Self",
+                entry_date=DAY1,
+            )
+            for i in range(4)
+        ]
+        db.add_all(regs)
+        db.commit()
+        regs[0].entry_date = DAY2
+        regs[1].doctor_id = "D9"
+        db.delete(regs[2])
+        db.commit()
+
+        incremental = _counts(db, hospital)
+        rebuild_rollups(db, hospital)
+        assert _counts(db, hospital) == incremental
+    finally:
+        db.close()
@@ -0,0 +1,40 @@
+# tests/test_security.py
+"""The password hash pool and its limiter, across event loops and sync callers."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils import security
+
+
+@pytest.fixture
+def hash_pool(monkeypatch):
+    # A limiter smaller than the load thrown at it; spawned workers read
+    # BCRYPT_ROUNDS afresh, so their hashes stay cheap
+    monkeypatch.setenv("BCRYPT_ROUNDS", "4")
+    monkeypatch.setattr(security, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(security, "PASSWORD_HASH_CONCURRENCY", 2)
+    security.shutdown_hash_pool()
+    yield
+    security.shutdown_hash_pool()
+
+
+def test_limiter_survives_a_second_event_loop(hash_pool):
+    hashed = security.hash_password_pooled("secret")
+
+    async def burst():
+        results = await asyncio.gather(*(
+            security.verify_password_async("secret", hashed) for _ in range(6)
+        ))
+        return [ok for ok, _ in results]
+
+    # Each asyncio.run is a new loop; the limiter must not be bound to the first
+    assert asyncio.run(burst()) == [True] * 6
+    assert asyncio.run(burst()) == [True] * 6
+
+
+def test_pooled_hashing_from_threads(hash_pool):
+    with ThreadPoolExecutor(max_workers=6) as threads:
+        hashes = list(threads.map(security.hash_password_pooled, ["a", "b", "c", "d", "e", "f"]))
+    assert [security.verify_password(p, h) for p, h in zip("abcdef", hashes)] == [True] * 6
@@ -0,0 +1,42 @@
+# tests/test_snapshots.py
+"""Snapshot listings hand out storage-independent URLs."""
+import json
+
+import pytest
+
+from app.models import all_models as models
+from app.models.database import SessionLocal, engine
+
+
+@pytest.fixture
+def snapshot(db_engine):
+    db = SessionLocal()
+    row = models.Snapshots(
+        hospital_id=1, uid="UID-SNAP", visit_id=1, procedure_id=1,
+        procedure_datetime="2026-01-15T10:00:00",
+        file_src="/uploads/snapshots/frame.png",
+        file_thumbnail="/uploads/snapshots/thumbs/7_320.webp",
+        thumbnail_renditions=json.dumps({
+            "320": "/uploads/snapshots/thumbs/7_320.webp",
+            "960": "/uploads/snapshots/thumbs/7_960.webp",
+        }),
+    )
+    db.add(row)
+    db.commit()
+    snapshot_id = row.id
+    db.close()
+    yield snapshot_id
+    with engine.begin() as conn:
+        conn.execute(models.Snapshots.__table__.delete().where(models.Snapshots.__table__.c.id == snapshot_id))
+
+
+def test_listing_points_at_the_file_endpoint(snapshot, api_client):
+    item = api_client.get("/api/snapshots/?mfid=UID-SNAP").json()["mediafiles"][0]
+    url = f"/api/snapshots/{snapshot}/file"
+    assert item["file_src"] == url
+    assert item["file_thumbnail"] == f"{url}?size=320"
+    assert json.loads(item["thumbnail_renditions"]) == {"320": f"{url}?size=320", "960": f"{url}?size=960"}
+
+    # Local storage: the endpoint redirects to the stored path
+    response = api_client.get(item["file_thumbnail"], follow_redirects=False)
+    assert response.headers["location"] == "/uploads/snapshots/thumbs/7_320.webp"
@@ -0,0 +1,69 @@
+# tests/test_visit_numbering.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app.models import all_models as models
+from app.models.database import SessionLocal
+from app.routers.patient_registration import create_patient_registration
+from app.schemas.all import PatientRegistrationCreate
+
+THREADS = 8
+REGISTRATIONS_PER_THREAD = 10
+
+
+def _payload(uid: str) -> PatientRegistrationCreate:
+    return PatientRegistrationCreate(
+        uid=uid,
+        procedure_id=1,
+        procedure_name="Endoscopy",
+        doctor_id="D1",
+        doctor_name="Dr Test",
+        referrer_id="R1",
+        referrer_name="Self",
+        date="2026-01-15",
+    )
+
+
+def test_concurrent_registrations_get_contiguous_visit_ids(pg_engine, hospital):
+    """
+    Registrations for one uid racing on separate connections must each get
+    their own visit number: 1..N with no gaps or duplicates, and
+    total_visits must end at N.
+    """
+    user = SimpleNamespace(hspId=str(hospital))
+    start = threading.Barrier(THREADS)
+
+    def register(_):
+        start.wait()
+        visits = []
+        for _ in range(REGISTRATIONS_PER_THREAD):
+            db = SessionLocal()
+            try:
+                entry = create_patient_registration(_payload("UID-RACE"), db=db, current_user=user)
+                visits.append(entry.visit_id)
+            finally:
+                db.close()
+        return visits
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        visits = [v for chunk in pool.map(register, range(THREADS)) for v in chunk]
+
+    total = THREADS * REGISTRATIONS_PER_THREAD
+    assert sorted(visits) == list(range(1, total + 1))
+
+    db = SessionLocal()
+    try:
+        patient = db.query(models.PatientInfo).filter_by(hospital_id=hospital, uid="UID-RACE").one()
+        assert patient.total_visits == total
+
+        stored = [
+            v for (v,) in db.query(models.PatientRegistration.visit_id)
+            .filter_by(hospital_id=hospital, uid="UID-RACE")
+        ]
+        assert sorted(stored) == list(range(1, total + 1))
+
+        # Only the first visit creates the patient
+        assert db.get(models.Hospital, hospital).total_patients == 1
+    finally:
+        db.close()